@@ -1,19 +1,20 @@
 from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
 from models.schemas import ChatRequest, ChatResponse
 from services.chat_service import chat_service
-import json
-from datetime import datetime
+from config import settings
+import orjson
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+# 스트림 종료 프레임은 고정값이므로 미리 인코딩
+_SSE_DONE = b"data: [DONE]\n\n"
+
+
+def _error_frame(message: str) -> bytes:
+    """에러 메시지를 SSE 프레임으로 인코딩"""
+    return b"data: " + orjson.dumps({"type": "error", "message": message}) + b"\n\n"
 
-class DateTimeEncoder(json.JSONEncoder):
-    """Custom JSON encoder to handle datetime objects"""
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
 
 @router.post("", response_model=ChatResponse)
 async def chat_completion(request: ChatRequest):
@@ -43,7 +44,7 @@ async def chat_completion(request: ChatRequest):
 async def chat_stream(request: ChatRequest):
     async def generate_stream():
         try:
-            async for chunk in chat_service.process_chat_stream(
+            async for frame in chat_service.process_chat_stream(
                 session_id=request.session_id,
                 user_message=request.message,
                 max_new_tokens=request.max_new_tokens,
@@ -52,29 +53,19 @@ async def chat_stream(request: ChatRequest):
                 use_rag=request.use_rag,
                 top_k=request.top_k
             ):
-                yield f"data: {json.dumps(chunk, ensure_ascii=False, cls=DateTimeEncoder)}\n\n"
+                # 서비스가 SSE 프레임으로 인코딩해 전달
+                yield frame
             
-            yield "data: [DONE]\n\n"
+            yield _SSE_DONE
             
         except ValueError as e:
-            error_chunk = {
-                "type": "error",
-                "message": str(e)
-            }
-            yield f"data: {json.dumps(error_chunk)}\n\n"
+            yield _error_frame(str(e))
         except Exception as e:
-            error_chunk = {
-                "type": "error", 
-                "message": f"Chat processing failed: {str(e)}"
-            }
-            yield f"data: {json.dumps(error_chunk)}\n\n"
+            yield _error_frame(f"Chat processing failed: {str(e)}")
 
-    return StreamingResponse(
+    # 이미 SSE 형식으로 인코딩된 bytes는 그대로 전송되고, 긴 생성 중에는 ping으로 연결 유지
+    # (Cache-Control, Connection, X-Accel-Buffering 헤더는 EventSourceResponse가 설정)
+    return EventSourceResponse(
         generate_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
+        ping=settings.SSE_PING_INTERVAL
     )
\ No newline at end of file
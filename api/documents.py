@@ -1,16 +1,61 @@
+from typing import AsyncIterator, Dict
+import orjson
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, status
+from fastapi.responses import StreamingResponse
 from services.document_service import document_service
-from services.embedding_service import embedding_service
+from services.session_service import session_service
+from services.indexing_service import indexing_service
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
 
 
+async def _json_list_response(head: Dict, key: str, items: AsyncIterator[Dict]) -> StreamingResponse:
+    """head 필드 뒤에 items를 JSON 배열로 한 행씩 흘려보내고 total_count로 마무리"""
+    # 첫 행(첫 페이지)은 미리 조회해 쿼리 오류가 스트림 시작 전에 500으로 처리되도록 함
+    # 이후 페이지는 서비스가 페이지마다 읽기 연결을 잡았다 반납하므로 응답 전송 중에는 연결을 잡고 있지 않음
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def body():
+        yield orjson.dumps(head)[:-1] + b',"' + key.encode() + b'":['
+        if first is None:
+            yield b'],"total_count":0}'
+            return
+        yield orjson.dumps(first)
+        count = 1
+        try:
+            async for item in items:
+                yield b"," + orjson.dumps(item)
+                count += 1
+        except Exception as e:
+            # 응답 헤더는 이미 전송됐으므로 로그를 남기고 연결을 끊어 잘린 본문을 정상 응답으로 끝내지 않음
+            print(f"Failed to stream {key} after {count} items: {e}")
+            raise
+        yield b'],"total_count":' + str(count).encode() + b"}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+async def _discard_upload(document_id: str):
+    """청크 등록 도중 실패한 업로드의 문서 삭제 (pending 상태로 남거나 재시작 시 일부만 ready가 되지 않도록)"""
+    try:
+        # 이미 임베딩된 벡터도 함께 삭제되고, 큐에 남은 청크의 벡터는 인덱싱 워커가 제거함
+        await document_service.delete_document(document_id)
+    except Exception as e:
+        print(f"Failed to discard document {document_id}: {e}")
+    finally:
+        indexing_service.discard(document_id)
+
+
 # CREATE: 문서 업로드
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
 async def upload_document(
     file: UploadFile = File(...),
     session_id: str = Form(...)
 ):
+    document_id = None
     try:
         if not file.filename:
             raise HTTPException(
@@ -18,31 +63,53 @@ async def upload_document(
                 detail="No filename provided"
             )
 
-        file_content = await file.read()
+        # 없는 세션이면 파일을 청크로 나누기 전에 404 (외래키 오류로 500이 되지 않도록)
+        if not await session_service.get_session(session_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Session {session_id} not found"
+            )
+
+        # UploadFile은 이미 SpooledTemporaryFile(1MB 초과 시 디스크)로 저장되어 있으므로
+        # 본문 전체를 bytes로 읽지 않고 파일 객체를 그대로 전달
+        await file.seek(0)
 
-        document_id, chunk_data = await document_service.process_file(
-            file_content=file_content,
+        document_id, chunk_batches = await document_service.process_file(
+            file=file.file,
             filename=file.filename,
             session_id=session_id
         )
 
-        await document_service.save_chunks(chunk_data)
+        # 청크는 저장 후 임베딩 큐에 넘기고 바로 응답 (임베딩 진행 상태는 문서 목록의 status로 확인)
+        chunks_count = 0
+        async for chunk_data in chunk_batches:
+            await document_service.save_chunks(chunk_data)
+            await indexing_service.enqueue(chunk_data)
+            chunks_count += len(chunk_data)
 
-        embedding_ids = await embedding_service.update_chunk_embeddings(chunk_data)
+        document_status = await indexing_service.seal(document_id)
 
         return {
             "document_id": document_id,
             "filename": file.filename,
-            "chunks_count": len(chunk_data),
-            "embedding_ids": embedding_ids
+            "chunks_count": chunks_count,
+            "status": document_status,
+            # 임베딩은 백그라운드에서 진행되므로 응답 시점에는 비어 있음 (기존 클라이언트 호환용으로 키 유지)
+            "embedding_ids": []
         }
 
+    except HTTPException:
+        raise
     except ValueError as e:
+        if document_id is not None:
+            await _discard_upload(document_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     except Exception as e:
+        if document_id is not None:
+            await _discard_upload(document_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process document: {str(e)}"
@@ -53,12 +120,11 @@ async def upload_document(
 @router.get("")
 async def get_session_documents(session_id: str):
     try:
-        documents = await document_service.get_session_documents(session_id)
-        return {
-            "session_id": session_id,
-            "documents": documents,
-            "total_count": len(documents)
-        }
+        return await _json_list_response(
+            {"session_id": session_id},
+            "documents",
+            document_service.iter_session_documents(session_id)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -70,12 +136,11 @@ async def get_session_documents(session_id: str):
 @router.get("/{document_id}/chunks")
 async def get_document_chunks(document_id: str):
     try:
-        chunks = await document_service.get_document_chunks(document_id)
-        return {
-            "document_id": document_id,
-            "chunks": chunks,
-            "total_count": len(chunks)
-        }
+        return await _json_list_response(
+            {"document_id": document_id},
+            "chunks",
+            document_service.iter_document_chunks(document_id)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,28 +1,81 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
 from fastapi import APIRouter
 from datetime import datetime
 from models.schemas import HealthResponse
 from services.llm_client import llm_client
 from models.database import db_manager
+from config import settings
 
 router = APIRouter(prefix="/api", tags=["health"])
 
-@router.get("/health", response_model=HealthResponse)
-async def health_check():
-    """서버 및 연결 상태 확인"""
-    
-    # LLM 서버 상태 확인
-    llm_available = await llm_client.health_check()
-    
-    # 데이터베이스 연결 상태 확인
-    db_connected = True
+
+class _HealthCache:
+    """헬스체크 결과를 TTL 동안 캐시하고, 만료 시 동시 요청이 하나의 probe를 공유"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.expires_at = 0.0
+        self.value: Optional[HealthResponse] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def get(self, probe: Callable[[], Awaitable[HealthResponse]]) -> HealthResponse:
+        if time.monotonic() < self.expires_at:
+            return self.value
+
+        # 이벤트 루프 안에서 lock 생성
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # lock 대기 중 다른 요청이 이미 갱신했으면 그 결과 사용
+            if time.monotonic() < self.expires_at:
+                return self.value
+
+            self.value = await probe()
+            self.expires_at = time.monotonic() + self.ttl
+            return self.value
+
+
+_health_cache = _HealthCache(ttl=settings.HEALTH_CACHE_TTL_SECONDS)
+
+
+# 쓰기 잠금 등으로 DB가 응답하지 않을 때 헬스체크가 오래 대기하지 않도록 제한
+_DB_PROBE_TIMEOUT = 0.25
+
+
+async def _ping_db():
+    async with db_manager.acquire_reader() as conn:
+        async with conn.execute("SELECT 1") as cursor:
+            await cursor.fetchone()
+
+
+async def _db_connected() -> bool:
+    """데이터베이스가 실제로 쿼리에 응답하는지 확인"""
     try:
-        await db_manager.get_connection()
+        await asyncio.wait_for(_ping_db(), timeout=_DB_PROBE_TIMEOUT)
+        return True
     except Exception:
-        db_connected = False
-    
+        return False
+
+
+async def _probe_health() -> HealthResponse:
+    # LLM 서버와 데이터베이스 상태를 동시에 확인
+    llm_available, db_connected = await asyncio.gather(
+        llm_client.health_check(),
+        _db_connected()
+    )
+
     return HealthResponse(
         status="healthy" if (llm_available and db_connected) else "degraded",
         timestamp=datetime.now(),
         llm_server_available=llm_available,
         database_connected=db_connected
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/health", response_model=HealthResponse)
+async def health_check():
+    """서버 및 연결 상태 확인 (결과는 HEALTH_CACHE_TTL_SECONDS 동안 캐시)"""
+    return await _health_cache.get(_probe_health)
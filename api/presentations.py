@@ -1,24 +1,21 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+from sse_starlette.sse import EventSourceResponse
 from models.schemas import (
     PresentationCreate, PresentationResponse, PresentationListResponse,
-    AnalysisRequest, AnalysisResponse, ConversionRequest, ConversionResponse
+    AnalysisRequest, AnalysisResponse, ConversionRequest, ConversionResponse,
+    AnalyzeAndConvertRequest
 )
 from services.presentation_service import presentation_service
-import json
-from datetime import datetime
+from config import settings
+import orjson
 
 router = APIRouter()
 
-
-class DateTimeEncoder(json.JSONEncoder):
-    """Custom JSON encoder to handle datetime objects"""
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
-
+# 조회 응답은 DB 값으로 이미 검증된 모델이므로 재검증 없이 바로 JSON bytes로 직렬화
+_dump_presentation = TypeAdapter(PresentationResponse).dump_json
+_dump_analysis = TypeAdapter(AnalysisResponse).dump_json
 
 
 @router.get("/{presentation_id}", response_model=PresentationResponse)
@@ -27,14 +24,15 @@ async def get_presentation(presentation_id: str):
     presentation = await presentation_service.get_presentation(presentation_id)
     if not presentation:
         raise HTTPException(status_code=404, detail="발표자료를 찾을 수 없습니다.")
-    return presentation
+    return Response(_dump_presentation(presentation), media_type="application/json")
 
 
 @router.get("/list/{session_id}", response_model=PresentationListResponse)
 async def list_presentations(session_id: str):
     """세션별 발표자료 목록 조회"""
     try:
-        return await presentation_service.list_presentations(session_id)
+        presentations = await presentation_service.list_presentations(session_id)
+        return ORJSONResponse(presentations.model_dump(mode="json"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"발표자료 목록 조회 중 오류가 발생했습니다: {str(e)}")
 
@@ -46,14 +44,12 @@ async def analyze_topic_stream(request: AnalysisRequest):
         async def stream_generator():
             async for chunk in presentation_service.analyze_topic_stream(request):
                 # SSE 형식으로 데이터 전송
-                yield f"data: {json.dumps(chunk, ensure_ascii=False, cls=DateTimeEncoder)}\n\n"
+                yield b"data: " + orjson.dumps(chunk, default=str) + b"\n\n"
         
-        return StreamingResponse(
+        return EventSourceResponse(
             stream_generator(),
-            media_type="text/event-stream",
+            ping=settings.SSE_PING_INTERVAL,
             headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Headers": "*",
             }
@@ -69,14 +65,12 @@ async def convert_to_presentation_stream(request: ConversionRequest):
         async def stream_generator():
             async for chunk in presentation_service.convert_to_presentation_stream(request):
                 # SSE 형식으로 데이터 전송
-                yield f"data: {json.dumps(chunk, ensure_ascii=False, cls=DateTimeEncoder)}\n\n"
+                yield b"data: " + orjson.dumps(chunk, default=str) + b"\n\n"
         
-        return StreamingResponse(
+        return EventSourceResponse(
             stream_generator(),
-            media_type="text/event-stream",
+            ping=settings.SSE_PING_INTERVAL,
             headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Headers": "*",
             }
@@ -85,6 +79,27 @@ async def convert_to_presentation_stream(request: ConversionRequest):
         raise HTTPException(status_code=500, detail=f"발표자료 변환 중 오류가 발생했습니다: {str(e)}")
 
 
+@router.post("/generate")
+async def analyze_and_convert_stream(request: AnalyzeAndConvertRequest):
+    """주제 분석 후 발표자료까지 한 번에 생성 (스트리밍)"""
+    try:
+        async def stream_generator():
+            async for chunk in presentation_service.analyze_and_convert_stream(request):
+                # SSE 형식으로 데이터 전송
+                yield b"data: " + orjson.dumps(chunk, default=str) + b"\n\n"
+        
+        return EventSourceResponse(
+            stream_generator(),
+            ping=settings.SSE_PING_INTERVAL,
+            headers={
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Headers": "*",
+            }
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"발표자료 생성 중 오류가 발생했습니다: {str(e)}")
+
+
 @router.get("/analysis/{analysis_id}", response_model=AnalysisResponse)
 async def get_analysis(analysis_id: str):
     """분석 결과 조회"""
@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
 from typing import Optional
 from models.schemas import SessionCreate, SessionResponse, MessagesHistoryResponse
 from services.session_service import session_service
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
+# 조회 응답은 DB 값으로 이미 검증된 모델이므로 재검증 없이 바로 JSON bytes로 직렬화
+_dump_session = TypeAdapter(SessionResponse).dump_json
+
 @router.post("", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(session_data: Optional[SessionCreate] = None):
     """새 세션 생성"""
@@ -27,7 +32,7 @@ async def get_session(session_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Session {session_id} not found"
         )
-    return session
+    return Response(_dump_session(session), media_type="application/json")
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(session_id: str):
@@ -49,8 +54,10 @@ async def get_session_messages(session_id: str, limit: Optional[int] = None):
             detail=f"Session {session_id} not found"
         )
     
-    return MessagesHistoryResponse(
+    # response_model은 문서화용으로 유지하고, 직렬화는 jsonable_encoder 없이 직접 수행
+    history = MessagesHistoryResponse(
         session_id=session_id,
         messages=messages,
         total_count=len(messages)
-    )
\ No newline at end of file
+    )
+    return ORJSONResponse(history.model_dump(mode="json"))
\ No newline at end of file
@@ -1,24 +1,95 @@
 import os
+from typing import Final, List
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _parse_origins(raw: str) -> List[str]:
+    """쉼표로 구분된 CORS origin 목록 파싱 (공백/빈 항목 제거)"""
+    if raw.strip() == "*":
+        return ["*"]
+    return [origin.strip() for origin in raw.split(",") if origin.strip()]
+
+
+# 환경 변수는 import 시 한 번만 읽어 모듈 상수로 고정 (요청 경로에서는 상수를 직접 import)
+LLM_SERVER_URL: Final[str] = os.getenv("LLM_SERVER_URL", "http://localhost:8000")
+DATABASE_URL: Final[str] = os.getenv("DATABASE_URL", "chatbot.db")
+DB_POOL_SIZE: Final[int] = int(os.getenv("DB_POOL_SIZE", str(min(32, (os.cpu_count() or 1) * 2))))
+MAX_CONTEXT_MESSAGES: Final[int] = int(os.getenv("MAX_CONTEXT_MESSAGES", "10"))
+DEFAULT_MAX_TOKENS: Final[int] = int(os.getenv("DEFAULT_MAX_TOKENS", "256"))
+DEFAULT_TEMPERATURE: Final[float] = float(os.getenv("DEFAULT_TEMPERATURE", "0.7"))
+SESSION_TIMEOUT_HOURS: Final[int] = int(os.getenv("SESSION_TIMEOUT_HOURS", "24"))
+CONTEXT_CACHE_SIZE: Final[int] = int(os.getenv("CONTEXT_CACHE_SIZE", "1024"))
+CONTEXT_CACHE_TTL_SECONDS: Final[float] = float(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "300"))
+HOST: Final[str] = os.getenv("HOST", "0.0.0.0")
+PORT: Final[int] = int(os.getenv("PORT", "8080"))
+DEBUG: Final[bool] = os.getenv("DEBUG", "False").lower() in ("true", "1", "yes")
+CORS_ORIGINS: Final[List[str]] = _parse_origins(os.getenv("CORS_ORIGINS", "*"))
+# 모든 origin 허용 시 credentials는 허용할 수 없음 (CORS 스펙)
+CORS_ALLOW_ALL: Final[bool] = CORS_ORIGINS == ["*"]
+SSE_PING_INTERVAL: Final[int] = int(os.getenv("SSE_PING_INTERVAL", "15"))
+HEALTH_CACHE_TTL_SECONDS: Final[float] = float(os.getenv("HEALTH_CACHE_TTL_SECONDS", "1.0"))
+RESPONSE_CACHE_TTL_SECONDS: Final[float] = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "0"))
+RESPONSE_CACHE_REPLAY_CHARS: Final[int] = int(os.getenv("RESPONSE_CACHE_REPLAY_CHARS", "256"))
+
+CHROMA_PERSIST_DIR: Final[str] = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+CHROMA_MEMORY_LIMIT_BYTES: Final[int] = int(os.getenv("CHROMA_MEMORY_LIMIT_BYTES", "0"))
+DEFAULT_CHUNK_SIZE: Final[int] = int(os.getenv("DEFAULT_CHUNK_SIZE", "500"))
+DEFAULT_CHUNK_OVERLAP: Final[int] = int(os.getenv("DEFAULT_CHUNK_OVERLAP", "50"))
+DEFAULT_TOP_K: Final[int] = int(os.getenv("DEFAULT_TOP_K", "3"))
+MIN_SIMILARITY_SCORE: Final[float] = float(os.getenv("MIN_SIMILARITY_SCORE", "0.5"))
+RAG_BATCH_SIZE: Final[int] = int(os.getenv("RAG_BATCH_SIZE", "32"))
+RAG_BATCH_WAIT_MS: Final[int] = int(os.getenv("RAG_BATCH_WAIT_MS", "10"))
+EMBEDDING_BATCH_MAX_CHARS: Final[int] = int(os.getenv("EMBEDDING_BATCH_MAX_CHARS", "16000"))
+EMBEDDING_BATCH_MAX_TEXTS: Final[int] = int(os.getenv("EMBEDDING_BATCH_MAX_TEXTS", "64"))
+EMBEDDING_MAX_CONCURRENCY: Final[int] = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+INGEST_CHUNK_BATCH_SIZE: Final[int] = int(os.getenv("INGEST_CHUNK_BATCH_SIZE", "256"))
+LIST_PAGE_SIZE: Final[int] = int(os.getenv("LIST_PAGE_SIZE", "256"))
+INDEXING_WORKERS: Final[int] = int(os.getenv("INDEXING_WORKERS", "2"))
+INDEXING_BATCH_SIZE: Final[int] = int(os.getenv("INDEXING_BATCH_SIZE", "256"))
+INDEXING_BATCH_WAIT_MS: Final[int] = int(os.getenv("INDEXING_BATCH_WAIT_MS", "50"))
+INDEXING_QUEUE_SIZE: Final[int] = int(os.getenv("INDEXING_QUEUE_SIZE", "4096"))
+
+
 class Settings:
-    LLM_SERVER_URL: str = os.getenv("LLM_SERVER_URL", "http://localhost:8000")
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "chatbot.db")
-    MAX_CONTEXT_MESSAGES: int = int(os.getenv("MAX_CONTEXT_MESSAGES", "10"))
-    DEFAULT_MAX_TOKENS: int = int(os.getenv("DEFAULT_MAX_TOKENS", "256"))
-    DEFAULT_TEMPERATURE: float = float(os.getenv("DEFAULT_TEMPERATURE", "0.7"))
-    SESSION_TIMEOUT_HOURS: int = int(os.getenv("SESSION_TIMEOUT_HOURS", "24"))
-    HOST: str = os.getenv("HOST", "0.0.0.0")
-    PORT: int = int(os.getenv("PORT", "8080"))
-    DEBUG: bool = os.getenv("DEBUG", "False").lower() in ("true", "1", "yes")
-    CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "*").split(",")
+    __slots__ = ()
+
+    LLM_SERVER_URL: str = LLM_SERVER_URL
+    DATABASE_URL: str = DATABASE_URL
+    DB_POOL_SIZE: int = DB_POOL_SIZE
+    MAX_CONTEXT_MESSAGES: int = MAX_CONTEXT_MESSAGES
+    DEFAULT_MAX_TOKENS: int = DEFAULT_MAX_TOKENS
+    DEFAULT_TEMPERATURE: float = DEFAULT_TEMPERATURE
+    SESSION_TIMEOUT_HOURS: int = SESSION_TIMEOUT_HOURS
+    CONTEXT_CACHE_SIZE: int = CONTEXT_CACHE_SIZE
+    CONTEXT_CACHE_TTL_SECONDS: float = CONTEXT_CACHE_TTL_SECONDS
+    HOST: str = HOST
+    PORT: int = PORT
+    DEBUG: bool = DEBUG
+    CORS_ORIGINS: List[str] = CORS_ORIGINS
+    CORS_ALLOW_ALL: bool = CORS_ALLOW_ALL
+    SSE_PING_INTERVAL: int = SSE_PING_INTERVAL
+    HEALTH_CACHE_TTL_SECONDS: float = HEALTH_CACHE_TTL_SECONDS
+    RESPONSE_CACHE_TTL_SECONDS: float = RESPONSE_CACHE_TTL_SECONDS
+    RESPONSE_CACHE_REPLAY_CHARS: int = RESPONSE_CACHE_REPLAY_CHARS
     
-    CHROMA_PERSIST_DIR: str = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
-    DEFAULT_CHUNK_SIZE: int = int(os.getenv("DEFAULT_CHUNK_SIZE", "500"))
-    DEFAULT_CHUNK_OVERLAP: int = int(os.getenv("DEFAULT_CHUNK_OVERLAP", "50"))
-    DEFAULT_TOP_K: int = int(os.getenv("DEFAULT_TOP_K", "3"))
-    MIN_SIMILARITY_SCORE: float = float(os.getenv("MIN_SIMILARITY_SCORE", "0.5"))
+    CHROMA_PERSIST_DIR: str = CHROMA_PERSIST_DIR
+    CHROMA_MEMORY_LIMIT_BYTES: int = CHROMA_MEMORY_LIMIT_BYTES
+    DEFAULT_CHUNK_SIZE: int = DEFAULT_CHUNK_SIZE
+    DEFAULT_CHUNK_OVERLAP: int = DEFAULT_CHUNK_OVERLAP
+    DEFAULT_TOP_K: int = DEFAULT_TOP_K
+    MIN_SIMILARITY_SCORE: float = MIN_SIMILARITY_SCORE
+    RAG_BATCH_SIZE: int = RAG_BATCH_SIZE
+    RAG_BATCH_WAIT_MS: int = RAG_BATCH_WAIT_MS
+    EMBEDDING_BATCH_MAX_CHARS: int = EMBEDDING_BATCH_MAX_CHARS
+    EMBEDDING_BATCH_MAX_TEXTS: int = EMBEDDING_BATCH_MAX_TEXTS
+    EMBEDDING_MAX_CONCURRENCY: int = EMBEDDING_MAX_CONCURRENCY
+    INGEST_CHUNK_BATCH_SIZE: int = INGEST_CHUNK_BATCH_SIZE
+    LIST_PAGE_SIZE: int = LIST_PAGE_SIZE
+    INDEXING_WORKERS: int = INDEXING_WORKERS
+    INDEXING_BATCH_SIZE: int = INDEXING_BATCH_SIZE
+    INDEXING_BATCH_WAIT_MS: int = INDEXING_BATCH_WAIT_MS
+    INDEXING_QUEUE_SIZE: int = INDEXING_QUEUE_SIZE
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,7 +1,13 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from models.database import db_manager
+from services.chat_service import chat_service
+from services.indexing_service import indexing_service
+from services.rag_service import rag_service
+from services.vector_service import vector_service
+from services.llm_client import llm_client
 from api import sessions, chat, health, documents, presentations
 from config import settings
 
@@ -13,6 +19,9 @@ async def lifespan(app: FastAPI):
     try:
         await db_manager.connect()
         print("Database connected and tables created successfully!")
+        await vector_service.initialize()
+        await indexing_service.start()
+        await rag_service.start()
     except Exception as e:
         print(f"Failed to connect to database: {e}")
         raise
@@ -21,6 +30,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown: 데이터베이스 연결 해제
     print("Shutting down Chatbot Backend Server...")
+    await chat_service.wait_pending_saves()
+    await rag_service.stop()
+    await indexing_service.stop()
+    await llm_client.aclose()
     await db_manager.disconnect()
     print("Database disconnected.")
 
@@ -29,14 +42,15 @@ app = FastAPI(
     title="Chatbot Backend API",
     description="LLM 서버와 통신하는 챗봇 백엔드 API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
+    allow_credentials=not settings.CORS_ALLOW_ALL,
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -76,6 +90,7 @@ async def root():
             "presentations": {
                 "analyze": "POST /api/presentation/analyze (주제 분석 SSE 스트리밍)",
                 "convert": "POST /api/presentation/convert (PPT 변환 SSE 스트리밍)",
+                "generate": "POST /api/presentation/generate (주제 분석 + PPT 변환 SSE 스트리밍)",
                 "get": "GET /api/presentation/{presentation_id}",
                 "get_analysis": "GET /api/presentation/analysis/{analysis_id}",
                 "list": "GET /api/presentation/list/{session_id}"
@@ -1,39 +1,192 @@
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
 import aiosqlite
+from config import settings
+
+DATABASE_PATH = settings.DATABASE_URL
+
+# 쓰기 연결 PRAGMA (WAL: 읽기와 쓰기가 서로 막지 않음, NORMAL: 커밋마다 fsync 하지 않음)
+WRITER_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+    PRAGMA cache_size=-64000;
+"""
+
+# 읽기 전용 연결 PRAGMA (journal_mode는 쓰기 연결이 설정한 WAL을 그대로 따름)
+# 연결 수가 많으므로 페이지 캐시는 작게 두고 mmap으로 OS 페이지 캐시를 공유
+READER_PRAGMAS = """
+    PRAGMA query_only=ON;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+    PRAGMA cache_size=-20000;
+"""
+
+# 모든 연결은 autocommit 모드(isolation_level=None)로 열고, 쓰기는 transaction()에서 BEGIN IMMEDIATE/COMMIT을 명시
+# 연결별 prepared statement 캐시 크기 (sqlite3 기본값 128)
+CACHED_STATEMENTS = 256
+
+# 스키마 버전 (PRAGMA user_version에 기록). 스키마를 바꾸면 함께 올려야 재시작 시 마이그레이션이 실행됨
+SCHEMA_VERSION = 9
+
+PRESENTATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS presentations (
+        presentation_id TEXT PRIMARY KEY,
+        analysis_id TEXT,
+        session_id TEXT,
+        title TEXT,
+        topic TEXT,
+        content TEXT,
+        marp_content TEXT,
+        theme TEXT DEFAULT 'default',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE,
+        FOREIGN KEY (analysis_id) REFERENCES analyses (analysis_id) ON DELETE CASCADE
+    )
+"""
+
+
+def _read_only_uri(db_path: str) -> str:
+    """읽기 전용 연결용 SQLite URI"""
+    return Path(db_path).resolve().as_uri() + "?mode=ro"
+
+
+class SqlitePool:
+    """asyncio.Queue 기반 aiosqlite 연결 풀"""
+
+    def __init__(self, database: str, size: int, pragmas: str, uri: bool = False):
+        self.database = database
+        self.size = size
+        self.pragmas = pragmas
+        self.uri = uri
+        self._queue: Optional[asyncio.Queue] = None
+        self._connections: List[aiosqlite.Connection] = []
+
+    async def open(self):
+        """연결 생성 및 PRAGMA 적용"""
+        self._queue = asyncio.Queue(maxsize=self.size)
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.database, uri=self.uri, cached_statements=CACHED_STATEMENTS, isolation_level=None)
+            await conn.executescript(self.pragmas)
+            self._connections.append(conn)
+            self._queue.put_nowait(conn)
+
+    async def close(self):
+        """모든 연결 종료"""
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+
+    async def acquire(self) -> aiosqlite.Connection:
+        return await self._queue.get()
+
+    async def release(self, conn: aiosqlite.Connection):
+        # 커밋되지 않은 트랜잭션이 다음 사용자에게 넘어가지 않도록 정리
+        if conn.in_transaction:
+            await conn.rollback()
+        self._queue.put_nowait(conn)
 
-DATABASE_PATH = "chatbot.db"
 
 class DatabaseManager:
-    def __init__(self, db_path: str = DATABASE_PATH):
+    """쓰기 연결 1개 + 읽기 전용 연결 풀 (SQLite WAL은 동시에 한 writer만 허용)"""
+
+    def __init__(self, db_path: str = DATABASE_PATH, pool_size: int = settings.DB_POOL_SIZE):
         self.db_path = db_path
-        self._connection = None
+        self.pool_size = pool_size
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._readers: Optional[SqlitePool] = None
     
     async def connect(self):
-        """데이터베이스 연결"""
-        self._connection = await aiosqlite.connect(self.db_path)
-        await self.create_tables()
+        """쓰기 연결 생성, 테이블 생성 후 읽기 전용 풀 생성"""
+        writer = await aiosqlite.connect(self.db_path, cached_statements=CACHED_STATEMENTS, isolation_level=None)
+        await writer.executescript(WRITER_PRAGMAS)
+        await self.create_tables(writer)
+
+        # 테이블 재생성 마이그레이션이 cascade 삭제를 일으키지 않도록 외래키는 스키마 작업 후 활성화
+        await writer.execute("PRAGMA foreign_keys=ON")
+
+        # 읽기 전용 연결은 WAL 파일이 준비된 뒤에 열어야 함
+        readers = SqlitePool(_read_only_uri(self.db_path), self.pool_size, READER_PRAGMAS, uri=True)
+        await readers.open()
+
+        self._writer = writer
+        self._write_lock = asyncio.Lock()
+        self._readers = readers
     
     async def disconnect(self):
         """데이터베이스 연결 해제"""
-        if self._connection:
-            await self._connection.close()
+        if self._readers:
+            await self._readers.close()
+            self._readers = None
+        if self._writer:
+            await self._writer.close()
+            self._writer = None
+
+    async def ensure_connected(self):
+        """lifespan 밖(스크립트 등)에서 사용할 때 연결이 없으면 생성"""
+        if self._writer is None:
+            await self.connect()
+
+    @asynccontextmanager
+    async def acquire_writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """쓰기 연결을 독점 사용 (블록 안의 트랜잭션이 다른 요청과 섞이지 않음)"""
+        async with self._write_lock:
+            conn = self._writer
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    await conn.rollback()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡고 블록이 끝나면 커밋 (예외 시 롤백)"""
+        async with self.acquire_writer() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            await conn.commit()
+
+    @asynccontextmanager
+    async def acquire_reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """읽기 전용 풀에서 연결을 빌려 쓰고 블록이 끝나면 반환"""
+        pool = self._readers
+        conn = await pool.acquire()
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
     
-    async def create_tables(self):
-        """테이블 생성 및 마이그레이션"""
-        # 기본 테이블들 생성
-        await self._connection.executescript("""
+    async def create_tables(self, conn: aiosqlite.Connection):
+        """테이블 생성 및 마이그레이션 (스키마 버전이 최신이면 건너뜀)"""
+        cursor = await conn.execute("PRAGMA user_version")
+        (version,) = await cursor.fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+
+        # 기본 테이블들 생성 (executescript는 시작 전에 커밋하므로 BEGIN을 스크립트 안에 둠)
+        await conn.executescript("""
+            BEGIN IMMEDIATE;
+
             CREATE TABLE IF NOT EXISTS sessions (
                 session_id TEXT PRIMARY KEY,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 metadata TEXT DEFAULT '{}'
-            );
+            ) WITHOUT ROWID;
             
             CREATE TABLE IF NOT EXISTS messages (
                 message_id TEXT PRIMARY KEY,
                 session_id TEXT,
                 role TEXT CHECK(role IN ('user', 'assistant', 'system')),
                 content TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_at INTEGER DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER) * 1000000),
                 token_usage TEXT DEFAULT '{}',
                 FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE
             );
@@ -46,6 +199,7 @@ class DatabaseManager:
                 file_type TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 metadata TEXT DEFAULT '{}',
+                status TEXT DEFAULT 'ready',
                 FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE
             );
             
@@ -68,61 +222,68 @@ class DatabaseManager:
                 FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE
             );
             
-            CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages(session_id);
-            CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
+            CREATE TABLE IF NOT EXISTS response_cache (
+                cache_key TEXT PRIMARY KEY,
+                content TEXT,
+                complete TEXT,
+                expires_at REAL
+            ) WITHOUT ROWID;
+            
+            CREATE INDEX IF NOT EXISTS idx_messages_session_created ON messages(session_id, created_at DESC);
             CREATE INDEX IF NOT EXISTS idx_documents_session_id ON documents(session_id);
             CREATE INDEX IF NOT EXISTS idx_document_chunks_document_id ON document_chunks(document_id);
             CREATE INDEX IF NOT EXISTS idx_document_chunks_embedding_id ON document_chunks(embedding_id);
             CREATE INDEX IF NOT EXISTS idx_analyses_session_id ON analyses(session_id);
             CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses(created_at);
+            CREATE INDEX IF NOT EXISTS idx_response_cache_expires_at ON response_cache(expires_at);
         """)
         
-        # presentations 테이블 마이그레이션 처리
-        await self._migrate_presentations_table()
-        
-        await self._connection.commit()
+        # 스키마 생성부터 버전 기록까지 한 트랜잭션으로 커밋 (fsync 한 번)
+        try:
+            # presentations 테이블 마이그레이션 처리
+            await self._migrate_presentations_table(conn)
+
+            if version < 2:
+                await self._migrate_messages_indexes(conn)
+            if version < 3:
+                await self._migrate_sessions_without_rowid(conn)
+            if version < 4:
+                await self._create_message_triggers(conn)
+            if version < 5:
+                await self._migrate_messages_created_at_ns(conn)
+            if version < 6:
+                await self._clear_documents_content(conn)
+            if version < 7:
+                await self._migrate_documents_status(conn)
+            if version < 8:
+                await self._migrate_session_indexes(conn)
+
+            await conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
     
-    async def _migrate_presentations_table(self):
+    async def _migrate_presentations_table(self, conn: aiosqlite.Connection):
         """presentations 테이블 마이그레이션"""
         # 기존 presentations 테이블 구조 확인
-        cursor = await self._connection.execute("PRAGMA table_info(presentations)")
+        cursor = await conn.execute("PRAGMA table_info(presentations)")
         columns = await cursor.fetchall()
         column_names = [col[1] for col in columns]
         
-        if 'analysis_id' not in column_names:
+        if column_names and 'analysis_id' not in column_names:
             # 기존 테이블이 있지만 analysis_id 컬럼이 없는 경우
             print("Migrating presentations table to add analysis_id column...")
             
-            # 1. 기존 데이터 백업
-            await self._connection.execute("""
-                CREATE TABLE IF NOT EXISTS presentations_old AS 
-                SELECT * FROM presentations
-            """)
+            # 1. 기존 테이블을 백업용 이름으로 변경
+            await conn.execute("ALTER TABLE presentations RENAME TO presentations_old")
             
-            # 2. 기존 테이블 삭제
-            await self._connection.execute("DROP TABLE IF EXISTS presentations")
+            # 2. 새로운 구조로 테이블 재생성
+            await conn.execute(PRESENTATIONS_TABLE_SQL)
             
-            # 3. 새로운 구조로 테이블 재생성
-            await self._connection.execute("""
-                CREATE TABLE presentations (
-                    presentation_id TEXT PRIMARY KEY,
-                    analysis_id TEXT,
-                    session_id TEXT,
-                    title TEXT,
-                    topic TEXT,
-                    content TEXT,
-                    marp_content TEXT,
-                    theme TEXT DEFAULT 'default',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE,
-                    FOREIGN KEY (analysis_id) REFERENCES analyses (analysis_id) ON DELETE CASCADE
-                )
-            """)
-            
-            # 4. 기존 데이터 복원 (analysis_id는 NULL로)
+            # 3. 기존 데이터 복원 (analysis_id는 NULL로)
             try:
-                await self._connection.execute("""
+                await conn.execute("""
                     INSERT INTO presentations 
                     (presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at)
                     SELECT presentation_id, NULL, session_id, title, topic, content, marp_content, theme, created_at, updated_at
@@ -132,38 +293,111 @@ class DatabaseManager:
             except Exception as e:
                 print(f"Warning: Could not migrate existing data: {e}")
             
-            # 5. 백업 테이블 삭제
-            await self._connection.execute("DROP TABLE IF EXISTS presentations_old")
+            # 4. 백업 테이블 삭제
+            await conn.execute("DROP TABLE IF EXISTS presentations_old")
             
         else:
-            # analysis_id 컬럼이 이미 있는 경우, 테이블이 없으면 생성만
-            await self._connection.execute("""
-                CREATE TABLE IF NOT EXISTS presentations (
-                    presentation_id TEXT PRIMARY KEY,
-                    analysis_id TEXT,
+            # 테이블이 없으면 생성만
+            await conn.execute(PRESENTATIONS_TABLE_SQL)
+        
+        # 인덱스 생성 (세션별 목록은 created_at 순서까지 인덱스로 처리)
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_presentations_session_created ON presentations(session_id, created_at DESC)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_presentations_analysis_id ON presentations(analysis_id)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_presentations_created_at ON presentations(created_at)")
+
+    async def _migrate_messages_indexes(self, conn: aiosqlite.Connection):
+        """messages 단일 컬럼 인덱스 제거 (복합 인덱스 idx_messages_session_created로 대체)"""
+        await conn.execute("DROP INDEX IF EXISTS idx_messages_session_id")
+        await conn.execute("DROP INDEX IF EXISTS idx_messages_created_at")
+
+    async def _migrate_sessions_without_rowid(self, conn: aiosqlite.Connection):
+        """sessions 테이블을 WITHOUT ROWID로 재생성 (TEXT 기본키 조회 시 B-tree 한 번만 탐색)"""
+        cursor = await conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'sessions'")
+        (table_sql,) = await cursor.fetchone()
+        if "WITHOUT ROWID" in table_sql.upper():
+            return
+
+        # 외래키는 스키마 작업 후에 활성화되므로 DROP 시 messages 등이 cascade 삭제되지 않음
+        print("Migrating sessions table to WITHOUT ROWID...")
+        await conn.execute("""
+            CREATE TABLE sessions_new (
+                session_id TEXT PRIMARY KEY,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                metadata TEXT DEFAULT '{}'
+            ) WITHOUT ROWID
+        """)
+        await conn.execute("""
+            INSERT INTO sessions_new (session_id, created_at, last_accessed, metadata)
+            SELECT session_id, created_at, last_accessed, metadata FROM sessions
+        """)
+        await conn.execute("DROP TABLE sessions")
+        await conn.execute("ALTER TABLE sessions_new RENAME TO sessions")
+
+    async def _create_message_triggers(self, conn: aiosqlite.Connection):
+        """메시지 저장 시 세션 last_accessed 갱신 (채팅 요청마다 별도 UPDATE 불필요)"""
+        # 트리거가 sessions를 참조하므로 sessions 재생성(RENAME) 이후에 생성해야 함
+        # messages.created_at(epoch ns)을 sessions의 로컬 시간 TIMESTAMP 문자열로 변환
+        await conn.execute("DROP TRIGGER IF EXISTS trg_messages_touch_session")
+        await conn.execute("""
+            CREATE TRIGGER trg_messages_touch_session
+            AFTER INSERT ON messages
+            BEGIN
+                UPDATE sessions
+                SET last_accessed = strftime('%Y-%m-%d %H:%M:%f', NEW.created_at / 1000000000.0, 'unixepoch', 'localtime')
+                WHERE session_id = NEW.session_id;
+            END
+        """)
+
+    async def _migrate_messages_created_at_ns(self, conn: aiosqlite.Connection):
+        """messages.created_at을 TIMESTAMP 문자열에서 epoch 나노초 INTEGER로 변환"""
+        cursor = await conn.execute("PRAGMA table_info(messages)")
+        columns = {col[1]: col[2] for col in await cursor.fetchall()}
+        if columns.get("created_at", "").upper() != "INTEGER":
+            print("Migrating messages.created_at to INTEGER nanoseconds...")
+            await conn.execute("""
+                CREATE TABLE messages_new (
+                    message_id TEXT PRIMARY KEY,
                     session_id TEXT,
-                    title TEXT,
-                    topic TEXT,
+                    role TEXT CHECK(role IN ('user', 'assistant', 'system')),
                     content TEXT,
-                    marp_content TEXT,
-                    theme TEXT DEFAULT 'default',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE,
-                    FOREIGN KEY (analysis_id) REFERENCES analyses (analysis_id) ON DELETE CASCADE
+                    created_at INTEGER DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER) * 1000000),
+                    token_usage TEXT DEFAULT '{}',
+                    FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE
                 )
             """)
-        
-        # 인덱스 생성
-        await self._connection.execute("CREATE INDEX IF NOT EXISTS idx_presentations_session_id ON presentations(session_id)")
-        await self._connection.execute("CREATE INDEX IF NOT EXISTS idx_presentations_analysis_id ON presentations(analysis_id)")
-        await self._connection.execute("CREATE INDEX IF NOT EXISTS idx_presentations_created_at ON presentations(created_at)")
-    
-    async def get_connection(self):
-        """데이터베이스 연결 반환"""
-        if not self._connection:
-            await self.connect()
-        return self._connection
+            # 기존 값은 로컬 시간 문자열이므로 'utc' 변환 후 epoch 기준 밀리초 → 나노초
+            await conn.execute("""
+                INSERT INTO messages_new (message_id, session_id, role, content, created_at, token_usage)
+                SELECT message_id, session_id, role, content,
+                       CAST(ROUND((julianday(created_at, 'utc') - 2440587.5) * 86400000) AS INTEGER) * 1000000,
+                       token_usage
+                FROM messages
+            """)
+            await conn.execute("DROP TABLE messages")
+            await conn.execute("ALTER TABLE messages_new RENAME TO messages")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_created ON messages(session_id, created_at DESC)")
+
+        # 테이블을 다시 만들면 트리거도 함께 삭제되므로 재생성
+        await self._create_message_triggers(conn)
+
+    async def _clear_documents_content(self, conn: aiosqlite.Connection):
+        """documents.content 비우기 (본문은 document_chunks에만 저장)"""
+        # 빈 페이지는 이후 쓰기에 재사용되며, 파일 크기를 줄이려면 별도로 VACUUM 실행
+        await conn.execute("UPDATE documents SET content = NULL WHERE content IS NOT NULL")
+
+    async def _migrate_documents_status(self, conn: aiosqlite.Connection):
+        """documents.status 컬럼 추가 (pending/indexing/ready/failed, 기존 문서는 이미 임베딩되어 ready)"""
+        cursor = await conn.execute("PRAGMA table_info(documents)")
+        column_names = [col[1] for col in await cursor.fetchall()]
+        if 'status' not in column_names:
+            await conn.execute("ALTER TABLE documents ADD COLUMN status TEXT DEFAULT 'ready'")
+
+    async def _migrate_session_indexes(self, conn: aiosqlite.Connection):
+        """만료 세션 정리용 last_accessed 인덱스 추가, presentations 단일 컬럼 인덱스 제거 (복합 인덱스로 대체)"""
+        # sessions 재생성(WITHOUT ROWID) 이후에 만들어야 인덱스가 함께 삭제되지 않음
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_accessed ON sessions(last_accessed)")
+        await conn.execute("DROP INDEX IF EXISTS idx_presentations_session_id")
 
 # 전역 데이터베이스 매니저 인스턴스
 db_manager = DatabaseManager()
\ No newline at end of file
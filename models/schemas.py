@@ -66,7 +66,8 @@ class PresentationCreate(BaseModel):
     topic: str = Field(..., description="발표 주제")
     theme: Optional[str] = Field("default", description="Marp 테마")
 
-class PresentationResponse(BaseModel):
+# 발표자료 응답 공통 필드
+class _PresentationBase(BaseModel):
     presentation_id: str = Field(..., description="발표자료 ID")
     session_id: str = Field(..., description="세션 ID")
     title: str = Field(..., description="발표자료 제목")
@@ -75,6 +76,8 @@ class PresentationResponse(BaseModel):
     marp_content: str = Field(..., description="Marp 형식 마크다운")
     theme: str = Field(..., description="Marp 테마")
     created_at: datetime = Field(..., description="생성 시간")
+
+class PresentationResponse(_PresentationBase):
     updated_at: datetime = Field(..., description="수정 시간")
 
 class PresentationListResponse(BaseModel):
@@ -101,13 +104,9 @@ class ConversionRequest(BaseModel):
     analysis_id: str = Field(..., description="분석 ID")
     theme: Optional[str] = Field("default", description="Marp 테마")
 
-class ConversionResponse(BaseModel):
-    presentation_id: str = Field(..., description="발표자료 ID")
+class AnalyzeAndConvertRequest(AnalysisRequest):
+    theme: Optional[str] = Field("default", description="Marp 테마")
+
+class ConversionResponse(_PresentationBase):
     analysis_id: str = Field(..., description="분석 ID")
-    session_id: str = Field(..., description="세션 ID")
-    title: str = Field(..., description="발표자료 제목")
-    topic: str = Field(..., description="발표 주제")
     content: str = Field(..., description="원본 분석 내용")
-    marp_content: str = Field(..., description="Marp 형식 마크다운")
-    theme: str = Field(..., description="Marp 테마")
-    created_at: datetime = Field(..., description="생성 시간")
\ No newline at end of file
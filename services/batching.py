@@ -0,0 +1,26 @@
+import asyncio
+from typing import Any, List
+
+
+async def drain_batch(queue: asyncio.Queue, max_size: int, max_wait_ms: float) -> List[Any]:
+    """첫 항목을 기다린 뒤 max_wait_ms 동안 max_size개까지 큐에서 모음"""
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + max_wait_ms / 1000
+
+    while len(batch) < max_size:
+        try:
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+
+    return batch
@@ -1,52 +1,125 @@
-import uuid
-import json
+import asyncio
+import time
+import orjson
 from datetime import datetime
-from typing import Dict, List, Optional, AsyncGenerator
+from typing import Dict, List, Optional, AsyncGenerator, Tuple
+import aiosqlite
 from models.database import db_manager
-from models.schemas import ChatResponse, MessageResponse
+from models.schemas import ChatResponse, MessageResponse, RagContext
 from services.session_service import session_service
 from services.llm_client import llm_client
 from services.rag_service import rag_service
-from config import settings
+from services.ids import new_id
+from config import DEFAULT_MAX_TOKENS, DEFAULT_TEMPERATURE, MAX_CONTEXT_MESSAGES
+
+# 대화 히스토리에 시스템 메시지가 없을 때 앞에 붙이는 기본 프롬프트
+_SYSTEM_MSG = {
+    "role": "system",
+    "content": "Mi:dm(믿:음)은 KT에서 개발한 AI 기반 어시스턴트이다."
+}
+_SYSTEM_PREFIX = [_SYSTEM_MSG]
+
+_INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (message_id, session_id, role, content, created_at, token_usage)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# SSE 프레임 인코딩 (토큰 이벤트는 dict 생성 없이 바로 bytes로 조립)
+_TOKEN_FRAME_PREFIX = b'data: {"type":"token","content":'
+
+
+def _sse_frame(event: Dict) -> bytes:
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+def _token_frame(content: str, token_count: int) -> bytes:
+    return b"".join((
+        _TOKEN_FRAME_PREFIX, orjson.dumps(content),
+        b',"token_count":', str(token_count).encode(), b"}\n\n"
+    ))
+
+
+_START_FRAME = _sse_frame({"type": "start", "message": "Stream started"})
+
+# 세션별 백그라운드 응답 저장 태스크 (완료 전에 GC되지 않도록 참조 유지, 다음 요청이 완료를 기다림)
+_pending_saves: Dict[str, asyncio.Task] = {}
+
+
+def _track_save(session_id: str, task: asyncio.Task):
+    _pending_saves[session_id] = task
+
+    def on_done(task: asyncio.Task):
+        if _pending_saves.get(session_id) is task:
+            del _pending_saves[session_id]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"메시지 저장 실패: {task.exception()}")
+
+    task.add_done_callback(on_done)
+
+
+async def _wait_pending_save(session_id: str):
+    """같은 세션의 직전 응답 저장이 끝날 때까지 대기 (이전 응답 없이 컨텍스트를 읽거나 순서가 뒤바뀌지 않도록)"""
+    task = _pending_saves.get(session_id)
+    if task is not None:
+        # 저장 실패는 on_done에서 기록하므로 여기서는 무시
+        await asyncio.gather(task, return_exceptions=True)
+
 
 class ChatService:
     
-    async def save_message(
+    def _prepare_message(
         self, 
         session_id: str, 
         role: str, 
         content: str, 
         token_usage: Optional[Dict] = None
-    ) -> MessageResponse:
-        """메시지를 데이터베이스에 저장"""
-        message_id = str(uuid.uuid4())
-        created_at = datetime.now()
+    ) -> Tuple[tuple, MessageResponse]:
+        """메시지 INSERT 파라미터와 응답 모델 생성 (저장은 하지 않음)"""
+        message_id = new_id()
+        # DB에는 epoch 나노초 정수로 저장하고 datetime은 응답 모델에서만 생성
+        created_at_ns = time.time_ns()
         
-        db = await db_manager.get_connection()
-        
-        await db.execute("""
-            INSERT INTO messages (message_id, session_id, role, content, created_at, token_usage)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
+        row = (
             message_id, 
             session_id, 
             role, 
             content, 
-            created_at,
-            json.dumps(token_usage) if token_usage else None
-        ))
-        
-        await db.commit()
+            created_at_ns,
+            orjson.dumps(token_usage).decode() if token_usage else None
+        )
         
-        return MessageResponse(
+        # 서비스가 직접 만든 값이므로 검증 없이 생성
+        return row, MessageResponse.model_construct(
             message_id=message_id,
             session_id=session_id,
             role=role,
             content=content,
-            created_at=created_at,
+            created_at=datetime.fromtimestamp(created_at_ns / 1e9),
             token_usage=token_usage
         )
     
+    async def save_message(
+        self, 
+        session_id: str, 
+        role: str, 
+        content: str, 
+        token_usage: Optional[Dict] = None
+    ) -> MessageResponse:
+        """메시지를 데이터베이스에 저장"""
+        row, message = self._prepare_message(session_id, role, content, token_usage)
+        await self.save_messages_batch([row])
+        return message
+    
+    async def save_messages_batch(self, rows: List[tuple]):
+        """여러 메시지를 한 트랜잭션으로 저장 (커밋 한 번)"""
+        try:
+            async with db_manager.transaction() as db:
+                await db.executemany(_INSERT_MESSAGE_SQL, rows)
+        except aiosqlite.IntegrityError as e:
+            # 세션이 삭제된 경우 외래키 제약 위반
+            raise ValueError(f"Session {rows[0][1]} not found") from e
+        session_service.cache_saved_messages(rows)
+    
     async def process_chat_request(
         self,
         session_id: str,
@@ -58,25 +131,24 @@ class ChatService:
         top_k: int = None
     ) -> ChatResponse:
         
-        session = await session_service.get_session(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
+        await _wait_pending_save(session_id)
         
-        await self.save_message(session_id, "user", user_message)
+        # 사용자 메시지는 응답과 함께 한 트랜잭션으로 저장하므로 컨텍스트에는 직접 추가
+        user_row, _ = self._prepare_message(session_id, "user", user_message)
         
-        context_messages = await session_service.get_recent_messages_for_context(session_id)
+        # 세션이 없으면 컨텍스트 조회에서 ValueError (LLM 호출 전에 확인)
+        context_messages, has_system = await session_service.get_recent_messages_for_context(
+            session_id, max(MAX_CONTEXT_MESSAGES - 1, 1)
+        )
+        context_messages.append({"role": "user", "content": user_message})
         
-        if not any(msg["role"] == "system" for msg in context_messages):
-            system_message = {
-                "role": "system", 
-                "content": "Mi:dm(믿:음)은 KT에서 개발한 AI 기반 어시스턴트이다."
-            }
-            context_messages.insert(0, system_message)
+        if not has_system:
+            context_messages = _SYSTEM_PREFIX + context_messages
         
         if max_new_tokens is None:
-            max_new_tokens = settings.DEFAULT_MAX_TOKENS
+            max_new_tokens = DEFAULT_MAX_TOKENS
         if temperature is None:
-            temperature = settings.DEFAULT_TEMPERATURE
+            temperature = DEFAULT_TEMPERATURE
         if do_sample is None:
             do_sample = True
         
@@ -98,20 +170,21 @@ class ChatService:
             use_rag_prompt=use_rag and rag_context is not None and len(rag_context) > 0
         )
         
-        assistant_message = await self.save_message(
+        assistant_row, assistant_message = self._prepare_message(
             session_id=session_id,
             role="assistant",
             content=llm_response["response"],
             token_usage=llm_response.get("usage")
         )
+        await self.save_messages_batch([user_row, assistant_row])
         
-        return ChatResponse(
+        return ChatResponse.model_construct(
             message_id=assistant_message.message_id,
             role="assistant",
             content=llm_response["response"],
             created_at=assistant_message.created_at,
             token_usage=llm_response.get("usage"),
-            rag_context=rag_metadata if use_rag and rag_metadata else None
+            rag_context=[RagContext.model_construct(**ctx) for ctx in rag_metadata] if use_rag and rag_metadata else None
         )
     
     async def process_chat_stream(
@@ -123,28 +196,22 @@ class ChatService:
         do_sample: bool = None,
         use_rag: bool = False,
         top_k: int = None
-    ) -> AsyncGenerator[Dict, None]:
-        
-        
-        session = await session_service.get_session(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
+    ) -> AsyncGenerator[bytes, None]:
+        """채팅 스트리밍 (SSE 프레임으로 인코딩된 bytes를 yield)"""
+        await _wait_pending_save(session_id)
         
+        # 세션이 없으면 외래키 제약으로 INSERT가 실패해 ValueError
         await self.save_message(session_id, "user", user_message)
         
-        context_messages = await session_service.get_recent_messages_for_context(session_id)
+        context_messages, has_system = await session_service.get_recent_messages_for_context(session_id)
         
-        if not any(msg["role"] == "system" for msg in context_messages):
-            system_message = {
-                "role": "system", 
-                "content": "Mi:dm(믿:음)은 KT에서 개발한 AI 기반 어시스턴트이다."
-            }
-            context_messages.insert(0, system_message)
+        if not has_system:
+            context_messages = _SYSTEM_PREFIX + context_messages
         
         if max_new_tokens is None:
-            max_new_tokens = settings.DEFAULT_MAX_TOKENS
+            max_new_tokens = DEFAULT_MAX_TOKENS
         if temperature is None:
-            temperature = settings.DEFAULT_TEMPERATURE  
+            temperature = DEFAULT_TEMPERATURE  
         if do_sample is None:
             do_sample = True
         
@@ -157,14 +224,13 @@ class ChatService:
                 top_k=top_k
             )
         
-        full_response = ""
+        # 토큰은 리스트에 모아 두고 마지막에 한 번만 합침
+        chunks: List[str] = []
+        full_response = None
         token_count = 0
         
         try:
-            yield {
-                "type": "start",
-                "message": "Stream started"
-            }
+            yield _START_FRAME
             
             async for chunk in llm_client.chat_stream(
                 messages=context_messages,
@@ -176,43 +242,47 @@ class ChatService:
             ):
                 if chunk.get("type") == "chunk":
                     token_content = chunk.get("content", "")
-                    full_response += token_content
+                    chunks.append(token_content)
                     token_count += 1
                     
-                    yield {
-                        "type": "token",
-                        "content": token_content,
-                        "token_count": token_count
-                    }
+                    yield _token_frame(token_content, token_count)
                     
                 elif chunk.get("type") == "complete":
-                    final_response = chunk.get("full_response", full_response)
-                    if final_response and final_response != full_response:
-                        full_response = final_response
+                    # 서버가 전체 응답을 보내면 그대로 사용
+                    full_response = chunk.get("full_response") or "".join(chunks)
                     
-                    yield {
+                    yield _sse_frame({
                         "type": "complete",
                         "total_tokens": token_count,
                         "rag_context": rag_metadata if use_rag and rag_metadata else None
-                    }
+                    })
                     
                 elif chunk.get("type") == "error":
-                    yield chunk
+                    yield _sse_frame(chunk)
                     return
             
+            if full_response is None:
+                full_response = "".join(chunks)
+            
             if full_response:
-                await self.save_message(
+                # complete 이벤트가 바로 전송되도록 응답 저장은 백그라운드에서 수행
+                task = asyncio.create_task(self.save_message(
                     session_id=session_id,
                     role="assistant",
                     content=full_response
-                )
+                ))
+                _track_save(session_id, task)
                 
         except Exception as e:
-            error_chunk = {
+            yield _sse_frame({
                 "type": "error",
                 "message": str(e)
-            }
-            yield error_chunk
+            })
+
+    async def wait_pending_saves(self):
+        """진행 중인 백그라운드 메시지 저장 완료 대기 (종료 시 DB 연결 해제 전에 호출)"""
+        if _pending_saves:
+            await asyncio.gather(*_pending_saves.values(), return_exceptions=True)
 
 # 전역 채팅 서비스 인스턴스
 chat_service = ChatService()
\ No newline at end of file
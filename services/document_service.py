@@ -1,215 +1,298 @@
-import uuid
-import json
-import io
+import asyncio
+import orjson
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, AsyncIterator, BinaryIO, Iterable, Iterator
 from pathlib import Path
+from itertools import islice
 
 import pypdf
+from charset_normalizer import from_bytes
 from docx import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from models.database import db_manager
-from config import settings
+from config import settings, INGEST_CHUNK_BATCH_SIZE, LIST_PAGE_SIZE
 from services.vector_service import vector_service
+from services.indexing_service import STATUS_PENDING
+from services.ids import new_id
+
+_INSERT_DOCUMENT_SQL = """
+    INSERT INTO documents (document_id, session_id, title, file_type, created_at, metadata, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_CHUNK_SQL = """
+    INSERT INTO document_chunks (chunk_id, document_id, chunk_index, content, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# .txt 인코딩 감지에 사용하는 앞부분 크기
+_ENCODING_SAMPLE_BYTES = 64 * 1024
 
 
 class DocumentService:
     def __init__(self):
+        self.chunk_size = settings.DEFAULT_CHUNK_SIZE
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.DEFAULT_CHUNK_SIZE,
+            chunk_size=self.chunk_size,
             chunk_overlap=settings.DEFAULT_CHUNK_OVERLAP,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=["\n\n", "\n", ". ", " ", ""],
+            # 청크 양끝 공백은 splitter가 제거하고 빈 청크도 만들지 않음 (문장 끝 ". "은 유지해야 하므로 keep_separator는 기본값)
+            strip_whitespace=True
         )
 
     async def process_file(
         self,
-        file_content: bytes,
+        file: BinaryIO,
         filename: str,
         session_id: str
-    ) -> Tuple[str, List[Dict]]:
-
+    ) -> Tuple[str, AsyncIterator[List[Dict]]]:
+        """문서를 저장하고 (document_id, 청크 배치 이터레이터) 반환. 청크는 배치를 꺼낼 때마다 분할됨"""
         file_ext = Path(filename).suffix.lower()
 
+        # 파싱은 CPU를 오래 쓰는 동기 작업이므로 이벤트 루프를 막지 않도록 스레드에서 실행
         if file_ext == '.pdf':
-            text = self._extract_pdf_text(file_content)
-        elif file_ext == '.docx':
-            text = self._extract_docx_text(file_content)
-        elif file_ext == '.txt':
-            try:
-                text = file_content.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    text = file_content.decode('euc-kr')
-                except UnicodeDecodeError:
-                    text = file_content.decode('cp949')
+            # PDF는 페이지 단위로 추출해 전체 본문을 메모리에 올리지 않음
+            pdf_reader = await asyncio.to_thread(pypdf.PdfReader, file)
+            pages = self._iter_pdf_pages(pdf_reader)
         else:
-            raise ValueError(f"Unsupported file type: {file_ext}")
+            pages = [await asyncio.to_thread(self._extract_text, file, file_ext)]
 
+        # 본문은 청크로만 저장 (documents.content는 NULL)
         document_id = await self._save_document(
             session_id=session_id,
             title=filename,
-            content=text,
             file_type=file_ext[1:]
         )
 
-        chunks = self._chunk_text(text)
-
-        chunk_data = []
-        for i, chunk in enumerate(chunks):
-            chunk_data.append({
-                'chunk_id': str(uuid.uuid4()),
-                'document_id': document_id,
-                'chunk_index': i,
-                'content': chunk,
-                'metadata': {
-                    'document_title': filename,
-                    'chunk_size': len(chunk),
-                    'session_id': session_id
-                }
-            })
+        return document_id, self._iter_chunk_batches(self._iter_chunks(pages), document_id, filename, session_id)
+
+    async def _iter_chunk_batches(
+        self,
+        chunks: Iterator[str],
+        document_id: str,
+        filename: str,
+        session_id: str
+    ) -> AsyncIterator[List[Dict]]:
+        chunk_index = 0
+        while True:
+            contents = await asyncio.to_thread(list, islice(chunks, INGEST_CHUNK_BATCH_SIZE))
+            if not contents:
+                return
+
+            chunk_data = []
+            for chunk in contents:
+                chunk_data.append({
+                    'chunk_id': new_id(),
+                    'document_id': document_id,
+                    'chunk_index': chunk_index,
+                    'content': chunk,
+                    'metadata': {
+                        'document_title': filename,
+                        'chunk_size': len(chunk),
+                        'session_id': session_id
+                    }
+                })
+                chunk_index += 1
+
+            yield chunk_data
+
+    def _extract_text(self, file: BinaryIO, file_ext: str) -> str:
+        # docx 파서는 파일 객체를 직접 읽으므로 업로드 본문 전체를 bytes로 올리지 않음
+        if file_ext == '.docx':
+            return self._extract_docx_text(file)
+        elif file_ext == '.txt':
+            return self._decode_text(file.read())
+        else:
+            raise ValueError(f"Unsupported file type: {file_ext}")
 
-        return document_id, chunk_data
+    def _decode_text(self, file_content: bytes) -> str:
+        """utf-8로 먼저 디코딩하고, 실패하면 앞부분만으로 인코딩을 감지해 한 번 더 디코딩"""
+        try:
+            return file_content.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
 
-    def _extract_pdf_text(self, file_content: bytes) -> str:
-        pdf_file = io.BytesIO(file_content)
-        pdf_reader = pypdf.PdfReader(pdf_file)
+        best = from_bytes(file_content[:_ENCODING_SAMPLE_BYTES]).best()
+        encoding = best.encoding if best else 'cp949'
+        return file_content.decode(encoding, errors='replace')
 
-        text = ""
+    def _iter_pdf_pages(self, pdf_reader: pypdf.PdfReader) -> Iterator[str]:
         for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
+            yield page.extract_text()
 
-        return text.strip()
+    def _extract_docx_text(self, file: BinaryIO) -> str:
+        document = Document(file)
 
-    def _extract_docx_text(self, file_content: bytes) -> str:
-        docx_file = io.BytesIO(file_content)
-        document = Document(docx_file)
+        paragraphs = [paragraph.text for paragraph in document.paragraphs]
+        return "\n".join(paragraphs).strip()
 
-        text = ""
-        for paragraph in document.paragraphs:
-            text += paragraph.text + "\n"
+    def _iter_chunks(self, pages: Iterable[str]) -> Iterator[str]:
+        """페이지를 차례로 분할하되, 마지막 청크는 다음 페이지 앞에 붙여 다시 분할 (페이지 경계에서도 overlap 유지)"""
+        carry = ""
+        for page in pages:
+            chunks = self._chunk_text(f"{carry}\n{page}" if carry else page)
+            if not chunks:
+                continue
+            carry = chunks.pop()
+            yield from chunks
 
-        return text.strip()
+        if carry:
+            yield carry
 
     def _chunk_text(self, text: str) -> List[str]:
-        chunks = self.text_splitter.split_text(text)
-        return [chunk.strip() for chunk in chunks if chunk.strip()]
+        """문단 단위로 먼저 나눠 chunk_size 안에서 이어 붙이고, 긴 문단만 text_splitter로 분할"""
+        chunks = []
+        block = []
+        block_size = 0
+
+        for paragraph in text.split("\n\n"):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+
+            if len(paragraph) > self.chunk_size:
+                if block:
+                    chunks.append("\n\n".join(block))
+                    block = []
+                    block_size = 0
+                chunks.extend(self.text_splitter.split_text(paragraph))
+                continue
+
+            if block and block_size + 2 + len(paragraph) > self.chunk_size:
+                chunks.append("\n\n".join(block))
+                block = []
+                block_size = 0
+
+            block_size += len(paragraph) + (2 if block else 0)
+            block.append(paragraph)
+
+        if block:
+            chunks.append("\n\n".join(block))
+
+        # 문단은 strip 후 이어 붙였고 splitter 결과도 strip되어 있으므로 다시 정리하지 않음
+        return chunks
 
     async def _save_document(
         self,
         session_id: str,
         title: str,
-        content: str,
         file_type: str
     ) -> str:
-        document_id = str(uuid.uuid4())
-
-        db = await db_manager.get_connection()
-        await db.execute("""
-            INSERT INTO documents (document_id, session_id, title, content, file_type, created_at, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            document_id,
-            session_id,
-            title,
-            content,
-            file_type,
-            datetime.now(),
-            json.dumps({'original_filename': title})
-        ))
-        await db.commit()
+        document_id = new_id()
+
+        async with db_manager.transaction() as db:
+            await db.execute(_INSERT_DOCUMENT_SQL, (
+                document_id,
+                session_id,
+                title,
+                file_type,
+                datetime.now().isoformat(" "),
+                None,  # 파일명은 title에 있으므로 metadata는 비워 둠
+                STATUS_PENDING
+            ))
 
         return document_id
 
     async def save_chunks(self, chunks_data: List[Dict]):
-        db = await db_manager.get_connection()
-
-        for chunk_data in chunks_data:
-            await db.execute("""
-                INSERT INTO document_chunks (chunk_id, document_id, chunk_index, content, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
+        # 모든 행이 같은 시간 문자열을 공유 (행마다 datetime 어댑터를 거치지 않음)
+        now = datetime.now().isoformat(" ")
+        rows = [
+            (
                 chunk_data['chunk_id'],
                 chunk_data['document_id'],
                 chunk_data['chunk_index'],
                 chunk_data['content'],
-                datetime.now()
-            ))
+                now
+            )
+            for chunk_data in chunks_data
+        ]
 
-        await db.commit()
+        async with db_manager.transaction() as db:
+            await db.executemany(_INSERT_CHUNK_SQL, rows)
 
     async def get_session_documents(self, session_id: str) -> List[Dict]:
-        db = await db_manager.get_connection()
+        return [document async for document in self.iter_session_documents(session_id)]
 
-        cursor = await db.execute("""
-            SELECT document_id, title, file_type, created_at, metadata
+    async def iter_session_documents(self, session_id: str) -> AsyncIterator[Dict]:
+        # LIST_PAGE_SIZE행씩 (created_at, document_id) 키셋으로 읽고 페이지마다 읽기 연결 반납
+        rows = await self._fetch_page("""
+            SELECT document_id, title, file_type, created_at, metadata, status
             FROM documents 
             WHERE session_id = ?
-            ORDER BY created_at DESC
-        """, (session_id,))
-
-        rows = await cursor.fetchall()
-
-        documents = []
-        for row in rows:
-            documents.append({
-                'document_id': row[0],
-                'title': row[1],
-                'file_type': row[2],
-                'created_at': row[3],
-                'metadata': json.loads(row[4]) if row[4] else {}
-            })
-
-        return documents
+            ORDER BY created_at DESC, document_id DESC
+            LIMIT ?
+        """, (session_id, LIST_PAGE_SIZE))
+        while rows:
+            for row in rows:
+                yield {
+                    'document_id': row[0],
+                    'title': row[1],
+                    'file_type': row[2],
+                    'created_at': row[3],
+                    'metadata': orjson.loads(row[4]) if row[4] else {},
+                    'status': row[5]
+                }
+            if len(rows) < LIST_PAGE_SIZE:
+                return
+            last = rows[-1]
+            rows = await self._fetch_page("""
+                SELECT document_id, title, file_type, created_at, metadata, status
+                FROM documents 
+                WHERE session_id = ? AND (created_at, document_id) < (?, ?)
+                ORDER BY created_at DESC, document_id DESC
+                LIMIT ?
+            """, (session_id, last[3], last[0], LIST_PAGE_SIZE))
 
     async def delete_document(self, document_id: str) -> bool:
-        db = await db_manager.get_connection()
-
-        cursor = await db.execute(
-            "SELECT document_id FROM documents WHERE document_id = ?",
-            (document_id,)
-        )
-        if not await cursor.fetchone():
-            return False
-
-        cursor = await db.execute(
-            "SELECT embedding_id FROM document_chunks WHERE document_id = ? AND embedding_id IS NOT NULL",
-            (document_id,)
-        )
-        embedding_ids = [row[0] for row in await cursor.fetchall()]
+        # 트랜잭션에서는 SQL만 실행하고 벡터 DB 삭제는 커밋 후 수행 (Chroma 호출 동안 쓰기 잠금을 잡지 않음)
+        # embedding_id 조회를 같은 트랜잭션에 두어 조회와 삭제 사이에 기록된 embedding_id도 놓치지 않음
+        async with db_manager.transaction() as db:
+            cursor = await db.execute(
+                "SELECT embedding_id FROM document_chunks WHERE document_id = ? AND embedding_id IS NOT NULL",
+                (document_id,)
+            )
+            embedding_ids = [row[0] for row in await cursor.fetchall()]
+
+            # document_chunks는 외래키 ON DELETE CASCADE로 함께 삭제됨
+            cursor = await db.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
 
         if embedding_ids:
             await vector_service.delete_documents(embedding_ids)
 
-        await db.execute("DELETE FROM document_chunks WHERE document_id = ?", (document_id,))
-        await db.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
-        await db.commit()
-
-        return True
+        return cursor.rowcount > 0
 
     async def get_document_chunks(self, document_id: str) -> List[Dict]:
-        db = await db_manager.get_connection()
-
-        cursor = await db.execute("""
-            SELECT chunk_id, chunk_index, content, embedding_id, created_at
-            FROM document_chunks 
-            WHERE document_id = ?
-            ORDER BY chunk_index
-        """, (document_id,))
-
-        rows = await cursor.fetchall()
-
-        chunks = []
-        for row in rows:
-            chunks.append({
-                'chunk_id': row[0],
-                'chunk_index': row[1],
-                'content': row[2],
-                'embedding_id': row[3],
-                'created_at': row[4]
-            })
-
-        return chunks
+        return [chunk async for chunk in self.iter_document_chunks(document_id)]
+
+    async def iter_document_chunks(self, document_id: str) -> AsyncIterator[Dict]:
+        # LIST_PAGE_SIZE행씩 chunk_index 키셋으로 읽고 페이지마다 읽기 연결 반납
+        last_index = -1
+        while True:
+            rows = await self._fetch_page("""
+                SELECT chunk_id, chunk_index, content, embedding_id, created_at
+                FROM document_chunks 
+                WHERE document_id = ? AND chunk_index > ?
+                ORDER BY chunk_index
+                LIMIT ?
+            """, (document_id, last_index, LIST_PAGE_SIZE))
+            for row in rows:
+                yield {
+                    'chunk_id': row[0],
+                    'chunk_index': row[1],
+                    'content': row[2],
+                    'embedding_id': row[3],
+                    'created_at': row[4]
+                }
+            if len(rows) < LIST_PAGE_SIZE:
+                return
+            last_index = rows[-1][1]
+
+    async def _fetch_page(self, query: str, params: tuple) -> List[tuple]:
+        """목록 한 페이지 조회 (응답을 보내는 동안 읽기 연결을 잡고 있지 않도록 조회 후 바로 반납)"""
+        async with db_manager.acquire_reader() as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchall()
 
 
 document_service = DocumentService()
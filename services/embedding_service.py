@@ -1,8 +1,26 @@
+import asyncio
 import httpx
-from typing import List, Dict
-from config import settings
+from functools import lru_cache
+from typing import List, Dict, Optional
+from config import settings, EMBEDDING_BATCH_MAX_CHARS, EMBEDDING_BATCH_MAX_TEXTS, EMBEDDING_MAX_CONCURRENCY
+from services.llm_client import llm_client
 from services.vector_service import vector_service
-from models.database import db_manager
+
+# 한 UPDATE 문에 바인딩하는 행 수 (행당 파라미터 2개, SQLite 변수 개수 제한 이내)
+_UPDATE_ROWS_PER_STATEMENT = 500
+
+
+@lru_cache(maxsize=64)
+def _update_embedding_ids_sql(rows: int) -> str:
+    """행 수별 UPDATE 문 (같은 문자열을 재사용해 매번 조립하지 않고 statement 캐시에 적중)"""
+    return f"""
+        WITH v(chunk_id, embedding_id) AS (VALUES {",".join(["(?, ?)"] * rows)})
+        UPDATE document_chunks
+        SET embedding_id = v.embedding_id
+        FROM v
+        WHERE document_chunks.chunk_id = v.chunk_id
+        RETURNING chunk_id
+    """
 
 
 class EmbeddingService:
@@ -10,28 +28,53 @@ class EmbeddingService:
         self.llm_server_url = settings.LLM_SERVER_URL
         
     async def generate_embeddings(self, texts: List[str]) -> Dict:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.llm_server_url}/embeddings",
-                json={"texts": texts},
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()
+        return await llm_client.embeddings(texts)
     
-    async def generate_single_embedding(self, text: str) -> List[float]:
-        result = await self.generate_embeddings([text])
-        return result["embeddings"][0]
+    def _plan_batches(self, texts: List[str]) -> List[List[int]]:
+        """길이 내림차순으로 정렬한 뒤 문자 수/개수 예산 안에서 인덱스를 묶음 (비슷한 길이끼리 묶어 패딩 최소화)"""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+
+        batches = []
+        current = []
+        current_chars = 0
+        for i in order:
+            size = len(texts[i])
+            if current and (current_chars + size > EMBEDDING_BATCH_MAX_CHARS or len(current) >= EMBEDDING_BATCH_MAX_TEXTS):
+                batches.append(current)
+                current = []
+                current_chars = 0
+            current.append(i)
+            current_chars += size
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """여러 텍스트를 마이크로 배치로 나눠 동시에 임베딩하고 원래 순서로 복원"""
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+
+        async def embed_batch(batch: List[int]):
+            async with semaphore:
+                result = await self.generate_embeddings([texts[i] for i in batch])
+            for i, embedding in zip(batch, result["embeddings"]):
+                embeddings[i] = embedding
+
+        # 배치들을 동시에 요청하되 LLM 서버 부하를 고려해 동시 요청 수 제한
+        await asyncio.gather(*(embed_batch(batch) for batch in self._plan_batches(texts)))
+
+        return embeddings
     
-    async def update_chunk_embeddings(self, chunk_data: List[Dict]) -> List[str]:
+    async def embed_chunks(self, chunk_data: List[Dict]) -> List[str]:
+        """청크를 임베딩해 벡터 DB에 추가하고 embedding_id 목록 반환 (SQLite 기록은 record_chunk_embeddings)"""
         if not chunk_data:
             return []
         
         texts = [chunk["content"] for chunk in chunk_data]
         
         try:
-            embedding_result = await self.generate_embeddings(texts)
-            embeddings = embedding_result["embeddings"]
+            embeddings = await self.embed_texts(texts)
             
             documents = []
             metadatas = []
@@ -40,27 +83,30 @@ class EmbeddingService:
                 documents.append(chunk["content"])
                 metadatas.append(chunk["metadata"])
             
-            embedding_ids = await vector_service.add_documents(
+            return await vector_service.add_documents(
                 documents=documents,
                 embeddings=embeddings,
                 metadatas=metadatas
             )
             
-            db = await db_manager.get_connection()
-            for chunk, embedding_id in zip(chunk_data, embedding_ids):
-                await db.execute("""
-                    UPDATE document_chunks 
-                    SET embedding_id = ? 
-                    WHERE chunk_id = ?
-                """, (embedding_id, chunk["chunk_id"]))
-            
-            await db.commit()
-            
-            return embedding_ids
-            
         except httpx.HTTPError as e:
             raise Exception(f"Failed to generate embeddings: {str(e)}")
         except Exception as e:
             raise Exception(f"Failed to process embeddings: {str(e)}")
 
+    async def record_chunk_embeddings(self, db, chunk_data: List[Dict], embedding_ids: List[str]) -> List[str]:
+        """청크의 embedding_id 기록 (호출자가 연 트랜잭션 안에서 실행). 청크가 이미 삭제돼 기록하지 못한 embedding_id 반환"""
+        pairs = [
+            (chunk["chunk_id"], embedding_id)
+            for chunk, embedding_id in zip(chunk_data, embedding_ids)
+        ]
+        # (chunk_id, embedding_id) 목록을 VALUES로 묶어 UPDATE ... FROM 한 문장으로 갱신 (SQLite 3.33+, RETURNING은 3.35+)
+        recorded = set()
+        for start in range(0, len(pairs), _UPDATE_ROWS_PER_STATEMENT):
+            batch = pairs[start:start + _UPDATE_ROWS_PER_STATEMENT]
+            cursor = await db.execute(_update_embedding_ids_sql(len(batch)), [value for pair in batch for value in pair])
+            recorded.update(row[0] for row in await cursor.fetchall())
+
+        return [embedding_id for chunk_id, embedding_id in pairs if chunk_id not in recorded]
+
 embedding_service = EmbeddingService()
\ No newline at end of file
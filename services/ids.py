@@ -0,0 +1,18 @@
+import os
+from base64 import urlsafe_b64encode
+from collections import deque
+
+# os.urandom을 한 번에 호출해 ID 여러 개를 미리 생성
+_ID_BATCH = 256
+_id_pool: deque = deque()
+
+
+def new_id() -> str:
+    """128비트 난수를 URL-safe base64로 인코딩한 22자 ID 발급 (uuid4 문자열보다 짧음)"""
+    if not _id_pool:
+        raw = os.urandom(16 * _ID_BATCH)
+        _id_pool.extend(
+            urlsafe_b64encode(raw[i:i + 16]).rstrip(b"=").decode()
+            for i in range(0, len(raw), 16)
+        )
+    return _id_pool.popleft()
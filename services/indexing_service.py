@@ -0,0 +1,196 @@
+import asyncio
+from collections import Counter
+from typing import List, Dict, Optional, Set, Tuple
+
+from models.database import db_manager
+from config import INDEXING_WORKERS, INDEXING_BATCH_SIZE, INDEXING_BATCH_WAIT_MS, INDEXING_QUEUE_SIZE
+from services.embedding_service import embedding_service
+from services.vector_service import vector_service
+from services.batching import drain_batch
+
+# documents.status 값
+STATUS_PENDING = "pending"
+STATUS_INDEXING = "indexing"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+class IndexingService:
+    """업로드된 청크를 큐에 모아 백그라운드에서 임베딩 (업로드 요청은 파싱/저장까지만 대기)"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # 문서별 아직 임베딩되지 않은 청크 수, 청크 등록이 끝난 문서
+        self._remaining: Counter = Counter()
+        self._sealed: Set[str] = set()
+
+    async def start(self):
+        """워커 시작 및 이전 실행에서 끝나지 않은 문서 재등록"""
+        self._queue = asyncio.Queue(maxsize=INDEXING_QUEUE_SIZE)
+
+        # 요청을 받기 전에 조회해 새 업로드와 겹치지 않도록 함
+        unfinished = await self._load_unfinished()
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(INDEXING_WORKERS)]
+        self._tasks.append(asyncio.create_task(self._resume(unfinished)))
+
+    async def stop(self):
+        """워커 종료 (남은 청크는 다음 시작 시 다시 등록됨)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, chunk_data: List[Dict]):
+        """저장된 청크를 임베딩 큐에 등록 (큐가 가득 차면 대기)"""
+        for chunk in chunk_data:
+            self._remaining[chunk['document_id']] += 1
+            await self._queue.put(chunk)
+
+    async def seal(self, document_id: str) -> Optional[str]:
+        """문서의 청크 등록 완료 표시 (남은 청크가 없으면 바로 ready), 표시 시점의 문서 상태 반환"""
+        if self._remaining[document_id] > 0:
+            self._sealed.add(document_id)
+            async with db_manager.acquire_reader() as db:
+                return await self._get_status(db, document_id)
+
+        del self._remaining[document_id]
+        async with db_manager.transaction() as db:
+            await self._set_status(db, [document_id], STATUS_READY)
+            # 이미 실패한 청크가 있으면 ready가 아니라 failed로 남음
+            return await self._get_status(db, document_id)
+
+    def discard(self, document_id: str):
+        """청크 등록 도중 중단된(삭제된) 문서의 카운터 정리 (큐에 남은 청크는 워커가 처리하면서 정리)"""
+        if self._remaining[document_id] > 0:
+            self._sealed.add(document_id)
+        else:
+            del self._remaining[document_id]
+
+    async def _worker(self):
+        while True:
+            batch = await drain_batch(self._queue, INDEXING_BATCH_SIZE, INDEXING_BATCH_WAIT_MS)
+            counts = Counter(chunk['document_id'] for chunk in batch)
+
+            embedded, failed = await self._embed(batch, counts)
+
+            ready = []
+            indexing = []
+            for document_id, count in counts.items():
+                self._remaining[document_id] -= count
+                done = self._remaining[document_id] <= 0 and document_id in self._sealed
+                if done:
+                    del self._remaining[document_id]
+                    self._sealed.discard(document_id)
+
+                if document_id not in failed:
+                    (ready if done else indexing).append(document_id)
+
+            # embedding_id 기록과 문서 상태 갱신을 배치당 한 트랜잭션으로 커밋
+            orphaned = []
+            try:
+                async with db_manager.transaction() as db:
+                    for chunk_data, embedding_ids in embedded:
+                        # 임베딩하는 동안 문서가 삭제됐으면 기록되지 않은 벡터를 돌려받음
+                        orphaned += await embedding_service.record_chunk_embeddings(db, chunk_data, embedding_ids)
+                    await self._set_status(db, list(failed), STATUS_FAILED)
+                    await self._set_status(db, ready, STATUS_READY)
+                    await self._set_status(db, indexing, STATUS_INDEXING)
+            except Exception as e:
+                print(f"Failed to record indexing results: {e}")
+                # 기록되지 않은 청크는 embedding_id가 NULL로 남아 다음 시작 시 다시 임베딩됨
+                orphaned = [embedding_id for _, embedding_ids in embedded for embedding_id in embedding_ids]
+
+            # SQLite에 기록되지 않은 벡터는 검색되지 않도록 커밋 후 제거
+            if orphaned:
+                try:
+                    await vector_service.delete_documents(orphaned)
+                except Exception as e:
+                    print(f"Failed to delete orphaned vectors: {e}")
+
+    async def _embed(self, batch: List[Dict], counts: Counter) -> Tuple[List[Tuple[List[Dict], List[str]]], Set[str]]:
+        """배치를 임베딩하고 ([(청크 목록, embedding_id 목록)], 실패한 문서 ID) 반환"""
+        try:
+            return [(batch, await embedding_service.embed_chunks(batch))], set()
+        except Exception as e:
+            if len(counts) == 1:
+                print(f"Failed to index document {next(iter(counts))}: {e}")
+                return [], set(counts)
+
+        # 여러 문서가 섞인 배치는 문서별로 다시 시도해 실패한 문서만 표시
+        embedded = []
+        failed = set()
+        for document_id in counts:
+            chunk_data = [chunk for chunk in batch if chunk['document_id'] == document_id]
+            try:
+                embedded.append((chunk_data, await embedding_service.embed_chunks(chunk_data)))
+            except Exception as e:
+                print(f"Failed to index document {document_id}: {e}")
+                failed.add(document_id)
+        return embedded, failed
+
+    async def _set_status(self, db, document_ids: List[str], status: str):
+        """문서 상태 갱신 (failed는 그대로 유지)"""
+        if not document_ids:
+            return
+
+        placeholders = ",".join("?" * len(document_ids))
+        await db.execute(f"""
+            UPDATE documents SET status = ?
+            WHERE document_id IN ({placeholders}) AND status != ?
+        """, (status, *document_ids, STATUS_FAILED))
+
+    async def _get_status(self, db, document_id: str) -> Optional[str]:
+        """문서 상태 조회 (문서가 없으면 None)"""
+        async with db.execute("SELECT status FROM documents WHERE document_id = ?", (document_id,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def _load_unfinished(self) -> Dict[str, List[Dict]]:
+        """pending/indexing 상태 문서별로 아직 임베딩되지 않은 청크 조회"""
+        unfinished: Dict[str, List[Dict]] = {}
+
+        async with db_manager.acquire_reader() as db:
+            async with db.execute("""
+                SELECT document_id FROM documents WHERE status IN (?, ?)
+            """, (STATUS_PENDING, STATUS_INDEXING)) as cursor:
+                async for row in cursor:
+                    unfinished[row[0]] = []
+
+            if not unfinished:
+                return unfinished
+
+            async with db.execute("""
+                SELECT c.chunk_id, c.document_id, c.chunk_index, c.content, d.title, d.session_id
+                FROM document_chunks c
+                JOIN documents d ON d.document_id = c.document_id
+                WHERE d.status IN (?, ?) AND c.embedding_id IS NULL
+                ORDER BY c.document_id, c.chunk_index
+            """, (STATUS_PENDING, STATUS_INDEXING)) as cursor:
+                async for row in cursor:
+                    unfinished[row[1]].append({
+                        'chunk_id': row[0],
+                        'document_id': row[1],
+                        'chunk_index': row[2],
+                        'content': row[3],
+                        'metadata': {
+                            'document_title': row[4],
+                            'chunk_size': len(row[3]),
+                            'session_id': row[5]
+                        }
+                    })
+
+        return unfinished
+
+    async def _resume(self, unfinished: Dict[str, List[Dict]]):
+        if unfinished:
+            print(f"Resuming indexing for {len(unfinished)} documents...")
+
+        for document_id, chunk_data in unfinished.items():
+            await self.enqueue(chunk_data)
+            await self.seal(document_id)
+
+
+# 전역 인덱싱 서비스 인스턴스
+indexing_service = IndexingService()
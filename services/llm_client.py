@@ -1,6 +1,7 @@
 import httpx
 import json
-from typing import List, Dict, Optional, AsyncGenerator
+import orjson
+from typing import List, Dict, Optional, AsyncGenerator, AsyncIterator
 from config import settings
 
 
@@ -8,13 +9,21 @@ class LLMClient:
     def __init__(self):
         self.base_url = settings.LLM_SERVER_URL
         self.timeout = httpx.Timeout(60.0)
+        # 요청마다 클라이언트를 만들지 않고 keep-alive 연결을 재사용 (임베딩 요청도 공유)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        )
+
+    async def aclose(self):
+        """HTTP 연결 풀 종료 (앱 종료 시 호출)"""
+        await self._client.aclose()
 
     async def health_check(self) -> bool:
         """LLM 서버 상태 확인"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/health")
-                return response.status_code == 200
+            response = await self._client.get(f"{self.base_url}/health")
+            return response.status_code == 200
         except Exception:
             return False
 
@@ -44,13 +53,21 @@ class LLMClient:
         print(
             f"[LLM Request] Payload: {json.dumps(payload, ensure_ascii=False, indent=2)}")
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/chat",
-                json=payload
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.post(
+            f"{self.base_url}/chat",
+            json=payload
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def embeddings(self, texts: List[str]) -> Dict:
+        """텍스트 임베딩 요청"""
+        response = await self._client.post(
+            f"{self.base_url}/embeddings",
+            json={"texts": texts}
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def chat_stream(
         self,
@@ -74,29 +91,36 @@ class LLMClient:
         if use_rag_prompt:
             payload["use_rag_prompt"] = use_rag_prompt
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/chat/stream",
-                json=payload
-            ) as response:
-                response.raise_for_status()
-
-                async for line in response.aiter_lines():
-                    if not line.strip():
-                        continue
-
-                    if line.startswith("data: "):
-                        data_content = line[6:]  # "data: " 제거
-
-                        if data_content == "[DONE]":
-                            break
-
-                        try:
-                            chunk_data = json.loads(data_content)
-                            yield chunk_data
-                        except json.JSONDecodeError:
-                            continue
+        async with self._client.stream(
+            "POST",
+            f"{self.base_url}/chat/stream",
+            json=payload
+        ) as response:
+            response.raise_for_status()
+
+            async for data_content in _aiter_sse_data(response.aiter_bytes()):
+                if data_content == b"[DONE]":
+                    break
+
+                try:
+                    yield orjson.loads(data_content)
+                except orjson.JSONDecodeError:
+                    continue
+
+
+async def _aiter_sse_data(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """SSE 바이트 스트림에서 "data: " 줄의 값만 bytes 그대로 추출 (str 디코딩 없이 줄 단위 분리)"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.startswith(b"data: "):
+                yield line[6:].rstrip(b"\r")  # "data: " 제거
+
+    # 마지막 줄이 줄바꿈 없이 끝난 경우
+    if buffer.startswith(b"data: "):
+        yield buffer[6:].rstrip(b"\r")
 
 
 # 전역 LLM 클라이언트 인스턴스
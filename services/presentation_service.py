@@ -1,20 +1,74 @@
+import io
 import re
-import uuid
 import json
-from typing import List, Optional, AsyncGenerator, Dict
+from typing import List, Optional, AsyncGenerator, Dict, Iterator, Union
 from datetime import datetime
+import zstandard
 from models.database import db_manager
 from models.schemas import (
     PresentationCreate, PresentationResponse, PresentationListResponse,
-    AnalysisRequest, AnalysisResponse, ConversionRequest, ConversionResponse
+    AnalysisRequest, AnalysisResponse, ConversionRequest, ConversionResponse,
+    AnalyzeAndConvertRequest
 )
-from services.llm_client import llm_client
-from services.rag_service import RAGService
+from services.response_cache import response_cache
+from services.rag_service import rag_service
+from services.session_service import session_service
+from services.ids import new_id
+
+# 슬라이드 변환에서 줄마다 쓰는 정규식은 모듈 로드 시 한 번만 컴파일
+_HEADER_PREFIX_RE = re.compile(r'^#+\s*')
+_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+# 줄 단위 ##/### 제목 (제목 뒤 # 이후는 버림, 공백만 있는 제목은 뒤에 #이 올 때만 인정)
+_SECTION_HEADER_RE = re.compile(r'^[^\S\n]*#{2,3}(?=[^#\n]*[^#\s]|[^#\n]+#)[^\S\n]*([^#\n]+)[^\n]*', re.MULTILINE)
+_NUMBERED_ITEM_RE = re.compile(r'^\d+\.\s+')
+
+# Marp 문서 머리말과 타이틀 슬라이드, 슬라이드 구분자
+_MARP_FRONT_MATTER = (
+    "---\n"
+    "marp: true\n"
+    "theme: default\n"
+    "paginate: true\n"
+    "backgroundColor: #fff\n"
+    "header: <span></span><img src=\"images/goorm_logo.png\" style=\"width: 80px; height: auto;\" />\n"
+    "footer: <img src=\"images/KT_Logo.svg\" style=\"width: 25px; height: auto;\" />\n"
+    "---\n"
+)
+_MARP_TITLE_SLIDE = "\n# {title} <!-- fit -->\n\n## 발표자료\n**생성일: {date}**\n\n---\n"
+_MARP_SLIDE_END = "\n\n---\n"
+
+# 분석/Marp 본문은 zstd로 압축해 BLOB으로 저장 (압축 도입 전에 저장된 TEXT 행은 그대로 읽음)
+_ZSTD_LEVEL = 3
+_compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def _pack_text(text: str) -> bytes:
+    return _compressor.compress(text.encode())
+
+
+def _unpack_text(value: Union[str, bytes]) -> str:
+    if isinstance(value, bytes):
+        return _decompressor.decompress(value).decode()
+    return value
+
+
+# 시간 값은 sqlite3 기본 datetime 어댑터와 같은 형식(isoformat(" "))의 문자열로 미리 만들어 바인딩
+_INSERT_PRESENTATION_SQL = """
+    INSERT INTO presentations 
+    (presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_ANALYSIS_SQL = """
+    INSERT INTO analyses 
+    (analysis_id, session_id, topic, content, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
 
 
 class PresentationService:
     def __init__(self):
-        self.rag_service = RAGService()
+        self.rag_service = rag_service
         self.analysis_prompt_template = """
 당신은 전문적인 주제 분석 전문가입니다. 주어진 주제에 대해 상세하고 체계적인 분석을 제공해주세요.
 
@@ -29,14 +83,24 @@ class PresentationService:
 
 주제에 대한 전문적이고 실용적인 분석을 제공해주세요.
 """
+        # 요청마다 템플릿을 format으로 다시 해석하지 않도록 {topic} 앞뒤로 미리 나눠 둠
+        self._analysis_prompt_prefix, self._analysis_prompt_suffix = self.analysis_prompt_template.split("{topic}")
 
 
 
     async def analyze_topic_stream(self, request: AnalysisRequest) -> AsyncGenerator[Dict, None]:
         """주제 분석 (스트리밍)"""
-        analysis_id = str(uuid.uuid4())
+        analysis_id = new_id()
         
         try:
+            # 없는 세션이면 LLM 생성 전에 중단 (생성 후 저장 단계에서 실패하지 않도록)
+            if not await session_service.get_session(request.session_id):
+                yield {
+                    "type": "error",
+                    "message": "세션을 찾을 수 없습니다."
+                }
+                return
+            
             # 1. 시작 알림
             yield {
                 "type": "start",
@@ -46,33 +110,10 @@ class PresentationService:
             }
             
             # 2. 분석 진행
-            yield {
-                "type": "progress",
-                "step": "analysis",
-                "message": f"'{request.topic}' 주제를 상세히 분석하고 있습니다..."
-            }
-            
-            content = ""
-            async for chunk in self._analyze_topic_stream(
-                topic=request.topic,
-                session_id=request.session_id,
-                use_rag=request.use_rag or False,
-                top_k=request.top_k or 5
-            ):
-                if chunk.get("type") == "chunk":
-                    content += chunk.get("content", "")
-                    yield {
-                        "type": "content_chunk",
-                        "step": "analysis",
-                        "content": chunk.get("content", ""),
-                        "accumulated_content": content
-                    }
-                elif chunk.get("type") == "complete":
-                    yield {
-                        "type": "step_complete",
-                        "step": "analysis",
-                        "message": "주제 분석이 완료되었습니다."
-                    }
+            content_parts: List[str] = []
+            async for event in self._analysis_events(request, content_parts):
+                yield event
+            content = "".join(content_parts)
             
             # 3. 데이터베이스 저장
             yield {
@@ -81,7 +122,7 @@ class PresentationService:
                 "message": "분석 결과를 저장하고 있습니다..."
             }
             
-            await self._save_analysis(
+            created_at = await self._save_analysis(
                 analysis_id=analysis_id,
                 session_id=request.session_id,
                 topic=request.topic,
@@ -94,12 +135,11 @@ class PresentationService:
                 "message": "분석 결과 저장이 완료되었습니다."
             }
             
-            # 4. 완료 알림
-            analysis = await self.get_analysis(analysis_id)
+            # 4. 완료 알림 (방금 저장한 값으로 응답 구성, 다시 조회하지 않음)
             yield {
                 "type": "complete",
                 "message": "주제 분석이 완료되었습니다!",
-                "analysis": analysis.model_dump(mode='json') if analysis else None
+                "analysis": self._analysis_payload(analysis_id, request.session_id, request.topic, content, created_at)
             }
             
         except Exception as e:
@@ -110,7 +150,8 @@ class PresentationService:
 
     async def convert_to_presentation_stream(self, request: ConversionRequest) -> AsyncGenerator[Dict, None]:
         """분석 내용을 발표자료로 변환 (스트리밍)"""
-        presentation_id = str(uuid.uuid4())
+        presentation_id = new_id()
+        theme = request.theme or "default"
         
         try:
             # 1. 분석 내용 조회
@@ -134,28 +175,10 @@ class PresentationService:
             }
             
             # 3. Marp 변환 단계
-            yield {
-                "type": "progress",
-                "step": "marp_conversion",
-                "message": "분석 내용을 Marp 형식으로 변환하고 있습니다..."
-            }
-            
-            marp_content = ""
-            async for chunk in self._convert_to_marp_stream(analysis.content):
-                if chunk.get("type") == "chunk":
-                    marp_content += chunk.get("content", "")
-                    yield {
-                        "type": "marp_chunk",
-                        "step": "marp_conversion",
-                        "content": chunk.get("content", ""),
-                        "accumulated_marp": marp_content
-                    }
-                elif chunk.get("type") == "complete":
-                    yield {
-                        "type": "step_complete",
-                        "step": "marp_conversion",
-                        "message": "Marp 형식 변환이 완료되었습니다."
-                    }
+            marp_parts: List[str] = []
+            async for event in self._marp_events(analysis.content, marp_parts):
+                yield event
+            marp_content = "".join(marp_parts)
             
             # 4. 데이터베이스 저장 단계
             yield {
@@ -164,7 +187,7 @@ class PresentationService:
                 "message": "발표자료를 저장하고 있습니다..."
             }
             
-            await self._save_presentation_with_analysis(
+            created_at = await self._save_presentation_with_analysis(
                 presentation_id=presentation_id,
                 analysis_id=request.analysis_id,
                 session_id=analysis.session_id,
@@ -172,7 +195,7 @@ class PresentationService:
                 topic=analysis.topic,
                 content=analysis.content,
                 marp_content=marp_content,
-                theme=request.theme or "default"
+                theme=theme
             )
             
             yield {
@@ -181,12 +204,14 @@ class PresentationService:
                 "message": "발표자료 저장이 완료되었습니다."
             }
             
-            # 5. 완료 알림
-            presentation = await self.get_presentation(presentation_id)
+            # 5. 완료 알림 (방금 저장한 값으로 응답 구성, 다시 조회하지 않음)
             yield {
                 "type": "complete",
                 "message": "발표자료 변환이 완료되었습니다!",
-                "presentation": presentation.model_dump(mode='json') if presentation else None
+                "presentation": self._presentation_payload(
+                    presentation_id, analysis.session_id, title, analysis.topic,
+                    analysis.content, marp_content, theme, created_at
+                )
             }
             
         except Exception as e:
@@ -195,21 +220,177 @@ class PresentationService:
                 "message": f"발표자료 변환 중 오류가 발생했습니다: {str(e)}"
             }
 
+    async def analyze_and_convert_stream(self, request: AnalyzeAndConvertRequest) -> AsyncGenerator[Dict, None]:
+        """주제 분석 후 바로 발표자료로 변환 (스트리밍, 분석 조회/저장 왕복 없이 한 요청으로 처리)"""
+        analysis_id = new_id()
+        presentation_id = new_id()
+        theme = request.theme or "default"
+        title = f"{request.topic} 발표자료"
+        
+        try:
+            # 없는 세션이면 LLM 생성 전에 중단
+            if not await session_service.get_session(request.session_id):
+                yield {
+                    "type": "error",
+                    "message": "세션을 찾을 수 없습니다."
+                }
+                return
+            
+            # 1. 시작 알림
+            yield {
+                "type": "start",
+                "message": "주제 분석 및 발표자료 생성을 시작합니다...",
+                "analysis_id": analysis_id,
+                "presentation_id": presentation_id,
+                "topic": request.topic
+            }
+            
+            # 2. 분석 진행 (LLM 생성은 이 단계 한 번뿐)
+            content_parts: List[str] = []
+            async for event in self._analysis_events(request, content_parts):
+                yield event
+            content = "".join(content_parts)
+            
+            # 3. Marp 변환 (메모리의 분석 내용을 바로 변환)
+            marp_parts: List[str] = []
+            async for event in self._marp_events(content, marp_parts):
+                yield event
+            marp_content = "".join(marp_parts)
+            
+            # 4. 분석과 발표자료를 한 트랜잭션으로 저장
+            yield {
+                "type": "progress",
+                "step": "saving",
+                "message": "분석 결과와 발표자료를 저장하고 있습니다..."
+            }
+            
+            created_at = await self._save_analysis_and_presentation(
+                analysis_id=analysis_id,
+                presentation_id=presentation_id,
+                session_id=request.session_id,
+                title=title,
+                topic=request.topic,
+                content=content,
+                marp_content=marp_content,
+                theme=theme
+            )
+            
+            yield {
+                "type": "step_complete",
+                "step": "saving",
+                "message": "분석 결과와 발표자료 저장이 완료되었습니다."
+            }
+            
+            # 5. 완료 알림 (방금 저장한 값으로 응답 구성)
+            yield {
+                "type": "complete",
+                "message": "발표자료 생성이 완료되었습니다!",
+                "analysis": self._analysis_payload(analysis_id, request.session_id, request.topic, content, created_at),
+                "presentation": self._presentation_payload(
+                    presentation_id, request.session_id, title, request.topic,
+                    content, marp_content, theme, created_at
+                )
+            }
+            
+        except Exception as e:
+            yield {
+                "type": "error",
+                "message": f"발표자료 생성 중 오류가 발생했습니다: {str(e)}"
+            }
 
+    async def _analysis_events(self, request: AnalysisRequest, content_parts: List[str]) -> AsyncGenerator[Dict, None]:
+        """분석 단계 이벤트 (클라이언트에는 델타만 보내고, 저장할 본문 조각은 content_parts에 모음)"""
+        yield {
+            "type": "progress",
+            "step": "analysis",
+            "message": f"'{request.topic}' 주제를 상세히 분석하고 있습니다..."
+        }
+        
+        async for chunk in self._analyze_topic_stream(
+            topic=request.topic,
+            session_id=request.session_id,
+            use_rag=request.use_rag or False,
+            top_k=request.top_k or 5
+        ):
+            if chunk.get("type") == "chunk":
+                delta = chunk.get("content", "")
+                content_parts.append(delta)
+                yield {
+                    "type": "content_chunk",
+                    "step": "analysis",
+                    "content": delta
+                }
+            elif chunk.get("type") == "complete":
+                yield {
+                    "type": "step_complete",
+                    "step": "analysis",
+                    "message": "주제 분석이 완료되었습니다."
+                }
 
+    async def _marp_events(self, content: str, marp_parts: List[str]) -> AsyncGenerator[Dict, None]:
+        """Marp 변환 단계 이벤트 (슬라이드 블록은 marp_parts에 모음)"""
+        yield {
+            "type": "progress",
+            "step": "marp_conversion",
+            "message": "분석 내용을 Marp 형식으로 변환하고 있습니다..."
+        }
+        
+        async for chunk in self._convert_to_marp_stream(content):
+            if chunk.get("type") == "chunk":
+                block = chunk.get("content", "")
+                marp_parts.append(block)
+                yield {
+                    "type": "marp_chunk",
+                    "step": "marp_conversion",
+                    "content": block
+                }
+            elif chunk.get("type") == "complete":
+                yield {
+                    "type": "step_complete",
+                    "step": "marp_conversion",
+                    "message": "Marp 형식 변환이 완료되었습니다."
+                }
+
+    def _analysis_payload(self, analysis_id: str, session_id: str, topic: str, content: str, created_at: datetime) -> Dict:
+        """방금 저장한 분석 결과의 응답 JSON (DB 값이므로 검증 없이 생성)"""
+        return AnalysisResponse.model_construct(
+            analysis_id=analysis_id,
+            session_id=session_id,
+            topic=topic,
+            content=content,
+            created_at=created_at
+        ).model_dump(mode='json')
+
+    def _presentation_payload(
+        self,
+        presentation_id: str,
+        session_id: str,
+        title: str,
+        topic: str,
+        content: str,
+        marp_content: str,
+        theme: str,
+        created_at: datetime
+    ) -> Dict:
+        """방금 저장한 발표자료의 응답 JSON (DB 값이므로 검증 없이 생성)"""
+        return PresentationResponse.model_construct(
+            presentation_id=presentation_id,
+            session_id=session_id,
+            title=title,
+            topic=topic,
+            content=content,
+            marp_content=marp_content,
+            theme=theme,
+            created_at=created_at,
+            updated_at=created_at
+        ).model_dump(mode='json')
 
     async def _convert_to_marp_stream(self, content: str) -> AsyncGenerator[Dict, None]:
-        """상세 내용을 Marp 형식으로 변환 (직접 변환)"""
-        # 직접 Marp 변환 로직 실행
-        marp_content = self._convert_to_marp_direct(content)
-        
-        # 변환된 내용을 청크 단위로 전송
-        chunk_size = 100  # 적당한 청크 크기
-        for i in range(0, len(marp_content), chunk_size):
-            chunk = marp_content[i:i+chunk_size]
+        """상세 내용을 Marp 형식으로 변환 (직접 변환, 슬라이드 블록이 만들어지는 대로 전송)"""
+        for block in self._iter_marp_blocks(content):
             yield {
                 "type": "chunk",
-                "content": chunk
+                "content": block
             }
         
         # 완료 신호
@@ -217,57 +398,34 @@ class PresentationService:
             "type": "complete"
         }
 
-    def _convert_to_marp_direct(self, content: str) -> str:
-        """분석 내용을 직접 Marp 형식으로 변환"""
+    def _iter_marp_blocks(self, content: str) -> Iterator[str]:
+        """분석 내용을 Marp 슬라이드 블록 단위 문자열로 변환 (블록을 이어 붙이면 전체 문서)"""
+        # 헤더 이후의 줄은 모두 앞에 줄바꿈을 붙여 기록
+        buf = io.StringIO()
+        buf.write(_MARP_FRONT_MATTER)
         
-        lines = content.split('\n')
-        
-        # Marp 헤더
-        marp_content = [
-            "---",
-            "marp: true",
-            "theme: default",
-            "paginate: true",
-            "backgroundColor: #fff",
-            "header: <span></span><img src=\"images/goorm_logo.png\" style=\"width: 80px; height: auto;\" />",
-            "footer: <img src=\"images/KT_Logo.svg\" style=\"width: 25px; height: auto;\" />",
-            "---",
-            ""
-        ]
-        
-        # 제목 추출 (첫 번째 섹션이나 주제에서)
+        # 제목 추출 (첫 번째 섹션이나 주제에서) 및 타이틀 슬라이드
         title = self._extract_title(content)
-        
-        # 타이틀 슬라이드
-        marp_content.extend([
-            f"# {title} <!-- fit -->",
-            "",
-            "## 발표자료",
-            f"**생성일: {datetime.now().strftime('%Y-%m-%d')}**",
-            "",
-            "---",
-            ""
-        ])
+        buf.write(_MARP_TITLE_SLIDE.format(title=title, date=datetime.now().strftime('%Y-%m-%d')))
         
         # 섹션 파싱 및 슬라이드 생성
         sections = self._parse_sections(content)
         
         # 목차 슬라이드
         if len(sections) > 1:
-            marp_content.extend([
-                "## 목차",
-                ""
-            ])
+            buf.write("\n## 목차\n")
             for i, section in enumerate(sections, 1):
-                marp_content.append(f"{i}. **{section['title']}**")
-            marp_content.extend(["", "---", ""])
+                buf.write(f"\n{i}. **{section['title']}**")
+            buf.write(_MARP_SLIDE_END)
+        
+        yield buf.getvalue()
         
         # 각 섹션을 슬라이드로 변환
         for section in sections:
-            slides = self._section_to_slides(section)
-            marp_content.extend(slides)
-        
-        return '\n'.join(marp_content)
+            buf.seek(0)
+            buf.truncate()
+            self._write_section_slides(section, buf)
+            yield buf.getvalue()
 
     def _extract_title(self, content: str) -> str:
         """내용에서 제목 추출"""
@@ -276,97 +434,58 @@ class PresentationService:
             line = line.strip()
             if line and not line.startswith('-') and not line.startswith('*'):
                 # 마크다운 헤더 제거
-                title = re.sub(r'^#+\s*', '', line)
+                title = _HEADER_PREFIX_RE.sub('', line)
                 # 볼드 마크다운 제거
-                title = re.sub(r'\*\*(.*?)\*\*', r'\1', title)
+                title = _BOLD_RE.sub(r'\1', title)
                 if len(title) > 5:  # 너무 짧은 제목 제외
                     return title[:50]  # 제목 길이 제한
         return "발표자료"
 
     def _parse_sections(self, content: str) -> list:
-        """내용을 섹션별로 파싱"""
-        
+        """내용을 섹션별로 파싱 (##, ### 제목 위치를 한 번에 찾고 제목 사이 본문을 잘라냄)"""
         sections = []
-        current_section = None
-        
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # 섹션 제목 감지 (##, ### 만)
-            section_match = re.match(r'^#{2,3}\s*([^#]+)', line)
-            
-            if section_match:
-                # 이전 섹션 저장
-                if current_section and current_section['content']:
-                    sections.append(current_section)
-                
-                # 새 섹션 시작
-                title = section_match.group(1)
-                if title:
-                    title = title.strip()
-                    current_section = {
-                        'title': title,
-                        'content': []
-                    }
-            else:
-                # 현재 섹션에 내용 추가
-                if current_section is not None:
-                    current_section['content'].append(line)
-        
-        # 마지막 섹션 저장
-        if current_section and current_section['content']:
-            sections.append(current_section)
-        
+        headers = list(_SECTION_HEADER_RE.finditer(content))
+
+        for i, header in enumerate(headers):
+            body_end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+            lines = [
+                stripped for line in content[header.end():body_end].split('\n')
+                if (stripped := line.strip())
+            ]
+            # 내용이 없는 섹션은 제외
+            if lines:
+                sections.append({
+                    'title': header.group(1).strip(),
+                    'content': lines
+                })
+
         return sections
 
-    def _section_to_slides(self, section: dict) -> list:
-        """섹션을 슬라이드로 변환"""
-        slides = []
+    def _write_section_slides(self, section: dict, buf: io.StringIO):
+        """섹션을 슬라이드로 변환해 buf에 기록"""
         title = section['title']
         content_lines = section['content']
         
         # 내용을 슬라이드 단위로 분할 (최대 4-5줄)
         max_lines_per_slide = 4
+        chunks = [content_lines[i:i+max_lines_per_slide] 
+                  for i in range(0, len(content_lines), max_lines_per_slide)]
         
-        if len(content_lines) <= max_lines_per_slide:
-            # 한 슬라이드로 충분
-            slides.extend([
-                f"## {title}",
-                ""
-            ])
-            for line in content_lines:
+        for i, chunk in enumerate(chunks, 1):
+            if len(chunks) > 1:
+                buf.write(f"\n## {title} ({i}/{len(chunks)})\n")
+            else:
+                buf.write(f"\n## {title}\n")
+            
+            for line in chunk:
                 formatted_line = self._format_line(line)
                 if formatted_line:
-                    slides.append(formatted_line)
-            slides.extend(["", "---", ""])
-        else:
-            # 여러 슬라이드로 분할
-            chunks = [content_lines[i:i+max_lines_per_slide] 
-                     for i in range(0, len(content_lines), max_lines_per_slide)]
-            
-            for i, chunk in enumerate(chunks, 1):
-                if len(chunks) > 1:
-                    slides.append(f"## {title} ({i}/{len(chunks)})")
-                else:
-                    slides.append(f"## {title}")
-                slides.append("")
-                
-                for line in chunk:
-                    formatted_line = self._format_line(line)
-                    if formatted_line:
-                        slides.append(formatted_line)
-                slides.extend(["", "---", ""])
-        
-        return slides
+                    buf.write("\n")
+                    buf.write(formatted_line)
+            buf.write(_MARP_SLIDE_END)
 
     def _format_line(self, line: str) -> str:
-        """라인을 Marp 형식으로 포맷팅"""
-        
-        line = line.strip()
+        """라인을 Marp 형식으로 포맷팅 (_parse_sections에서 이미 strip된 줄)"""
         if not line:
             return ""
         
@@ -375,9 +494,9 @@ class PresentationService:
             return line
         
         # 번호 목록을 불릿 포인트로 변환
-        if re.match(r'^\d+\.\s', line):
-            pattern = r'^\d+\.\s*'
-            return f"- {re.sub(pattern, '', line)}"
+        numbered = _NUMBERED_ITEM_RE.match(line)
+        if numbered:
+            return f"- {line[numbered.end():]}"
         
         # 일반 텍스트를 불릿 포인트로 변환
         if len(line) > 10:  # 너무 짧은 내용 제외
@@ -386,101 +505,63 @@ class PresentationService:
         return line
 
 
-    async def _save_presentation(
-        self, 
-        presentation_id: str,
-        session_id: str,
-        title: str,
-        topic: str,
-        content: str,
-        marp_content: str,
-        theme: str
-    ):
-        """발표자료를 데이터베이스에 저장 (분석 없이 직접 생성된 경우)"""
-        conn = await db_manager.get_connection()
-        
-        await conn.execute("""
-            INSERT INTO presentations 
-            (presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            presentation_id,
-            None,  # analysis_id는 NULL
-            session_id,
-            title,
-            topic,
-            content,
-            marp_content,
-            theme,
-            datetime.now(),
-            datetime.now()
-        ))
-        
-        await conn.commit()
-
     async def get_presentation(self, presentation_id: str) -> Optional[PresentationResponse]:
         """발표자료 조회"""
-        conn = await db_manager.get_connection()
-        
-        async with conn.execute("""
-            SELECT presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at
-            FROM presentations 
-            WHERE presentation_id = ?
-        """, (presentation_id,)) as cursor:
-            row = await cursor.fetchone()
+        async with db_manager.acquire_reader() as conn:
+            async with conn.execute("""
+                SELECT presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at
+                FROM presentations 
+                WHERE presentation_id = ?
+            """, (presentation_id,)) as cursor:
+                row = await cursor.fetchone()
             
-            if not row:
-                return None
+                if not row:
+                    return None
                 
-            return PresentationResponse(
-                presentation_id=row[0],
-                session_id=row[2],
-                title=row[3],
-                topic=row[4],
-                content=row[5],
-                marp_content=row[6],
-                theme=row[7],
-                created_at=datetime.fromisoformat(row[8]),
-                updated_at=datetime.fromisoformat(row[9])
-            )
-
-    async def list_presentations(self, session_id: str) -> PresentationListResponse:
-        """세션별 발표자료 목록 조회"""
-        conn = await db_manager.get_connection()
-        
-        # 발표자료 목록 조회
-        presentations = []
-        async with conn.execute("""
-            SELECT presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at
-            FROM presentations 
-            WHERE session_id = ?
-            ORDER BY created_at DESC
-        """, (session_id,)) as cursor:
-            async for row in cursor:
-                presentations.append(PresentationResponse(
+                return PresentationResponse(
                     presentation_id=row[0],
                     session_id=row[2],
                     title=row[3],
                     topic=row[4],
-                    content=row[5],
-                    marp_content=row[6],
+                    content=_unpack_text(row[5]),
+                    marp_content=_unpack_text(row[6]),
                     theme=row[7],
                     created_at=datetime.fromisoformat(row[8]),
                     updated_at=datetime.fromisoformat(row[9])
-                ))
-        
-        # 전체 개수 조회
-        async with conn.execute("""
-            SELECT COUNT(*) FROM presentations WHERE session_id = ?
-        """, (session_id,)) as cursor:
-            count_row = await cursor.fetchone()
-            total_count = count_row[0] if count_row else 0
-        
-        return PresentationListResponse(
-            session_id=session_id,
-            presentations=presentations,
-            total_count=total_count
-        )
+                )
+
+    async def list_presentations(self, session_id: str) -> PresentationListResponse:
+        """세션별 발표자료 목록 조회"""
+        async with db_manager.acquire_reader() as conn:
+            # 목록과 전체 개수를 한 번의 스캔으로 조회
+            presentations = []
+            total_count = 0
+            async with conn.execute("""
+                SELECT presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at,
+                       COUNT(*) OVER () AS total_count
+                FROM presentations 
+                WHERE session_id = ?
+                ORDER BY created_at DESC
+            """, (session_id,)) as cursor:
+                async for row in cursor:
+                    presentations.append(PresentationResponse(
+                        presentation_id=row[0],
+                        session_id=row[2],
+                        title=row[3],
+                        topic=row[4],
+                        content=_unpack_text(row[5]),
+                        marp_content=_unpack_text(row[6]),
+                        theme=row[7],
+                        created_at=datetime.fromisoformat(row[8]),
+                        updated_at=datetime.fromisoformat(row[9])
+                    ))
+                    total_count = row[10]
+        
+            return PresentationListResponse(
+                session_id=session_id,
+                presentations=presentations,
+                total_count=total_count
+            )
 
     # 새로운 헬퍼 메서드들
     async def _analyze_topic_stream(
@@ -498,7 +579,7 @@ class PresentationService:
             },
             {
                 "role": "user", 
-                "content": self.analysis_prompt_template.format(topic=topic)
+                "content": self._analysis_prompt_prefix + topic + self._analysis_prompt_suffix
             }
         ]
         
@@ -540,7 +621,8 @@ class PresentationService:
                 "reference_documents": reference_docs
             }
 
-        async for chunk in llm_client.chat_stream(
+        # 같은 주제/컨텍스트의 분석 요청은 캐시된 응답을 재생
+        async for chunk in response_cache.chat_stream(
             messages=messages,
             max_new_tokens=2048,
             temperature=0.7,
@@ -556,45 +638,33 @@ class PresentationService:
         session_id: str,
         topic: str,
         content: str
-    ):
-        """분석 결과를 데이터베이스에 저장"""
-        conn = await db_manager.get_connection()
-        
-        await conn.execute("""
-            INSERT INTO analyses 
-            (analysis_id, session_id, topic, content, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            analysis_id,
-            session_id,
-            topic,
-            content,
-            datetime.now()
-        ))
-        
-        await conn.commit()
+    ) -> datetime:
+        """분석 결과를 데이터베이스에 저장하고 생성 시간 반환"""
+        created_at = datetime.now()
+        async with db_manager.transaction() as conn:
+            await self._insert_analysis(conn, analysis_id, session_id, topic, content, created_at)
+        return created_at
 
     async def get_analysis(self, analysis_id: str) -> Optional[AnalysisResponse]:
         """분석 결과 조회"""
-        conn = await db_manager.get_connection()
-        
-        async with conn.execute("""
-            SELECT analysis_id, session_id, topic, content, created_at
-            FROM analyses 
-            WHERE analysis_id = ?
-        """, (analysis_id,)) as cursor:
-            row = await cursor.fetchone()
+        async with db_manager.acquire_reader() as conn:
+            async with conn.execute("""
+                SELECT analysis_id, session_id, topic, content, created_at
+                FROM analyses 
+                WHERE analysis_id = ?
+            """, (analysis_id,)) as cursor:
+                row = await cursor.fetchone()
             
-            if not row:
-                return None
+                if not row:
+                    return None
                 
-            return AnalysisResponse(
-                analysis_id=row[0],
-                session_id=row[1],
-                topic=row[2],
-                content=row[3],
-                created_at=datetime.fromisoformat(row[4])
-            )
+                return AnalysisResponse(
+                    analysis_id=row[0],
+                    session_id=row[1],
+                    topic=row[2],
+                    content=_unpack_text(row[3]),
+                    created_at=datetime.fromisoformat(row[4])
+                )
 
     async def _save_presentation_with_analysis(
         self, 
@@ -606,28 +676,72 @@ class PresentationService:
         content: str,
         marp_content: str,
         theme: str
+    ) -> datetime:
+        """분석 기반 발표자료를 데이터베이스에 저장하고 생성 시간 반환"""
+        created_at = datetime.now()
+        async with db_manager.transaction() as conn:
+            await self._insert_presentations(conn, [(
+                presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme
+            )], created_at)
+        return created_at
+
+    async def _save_analysis_and_presentation(
+        self,
+        analysis_id: str,
+        presentation_id: str,
+        session_id: str,
+        title: str,
+        topic: str,
+        content: str,
+        marp_content: str,
+        theme: str
+    ) -> datetime:
+        """분석 결과와 발표자료를 한 트랜잭션으로 저장하고 생성 시간 반환"""
+        created_at = datetime.now()
+        async with db_manager.transaction() as conn:
+            await self._insert_analysis(conn, analysis_id, session_id, topic, content, created_at)
+            await self._insert_presentations(conn, [(
+                presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme
+            )], created_at)
+        return created_at
+
+    async def _insert_analysis(
+        self,
+        conn,
+        analysis_id: str,
+        session_id: str,
+        topic: str,
+        content: str,
+        created_at: datetime
     ):
-        """분석 기반 발표자료를 데이터베이스에 저장"""
-        conn = await db_manager.get_connection()
-        
-        await conn.execute("""
-            INSERT INTO presentations 
-            (presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            presentation_id,
+        """분석 결과 INSERT (호출자가 연 트랜잭션 안에서 실행, 본문은 압축해 저장)"""
+        await conn.execute(_INSERT_ANALYSIS_SQL, (
             analysis_id,
             session_id,
-            title,
             topic,
-            content,
-            marp_content,
-            theme,
-            datetime.now(),
-            datetime.now()
+            _pack_text(content),
+            created_at.isoformat(" ")
         ))
-        
-        await conn.commit()
+
+    async def _insert_presentations(self, conn, rows: List[tuple], created_at: datetime):
+        """발표자료 여러 건을 executemany 한 번으로 INSERT (호출자가 연 트랜잭션 안에서 실행)"""
+        # rows: (presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme), 본문은 여기서 압축
+        created_at_text = created_at.isoformat(" ")
+        await conn.executemany(_INSERT_PRESENTATION_SQL, [
+            (
+                presentation_id,
+                analysis_id,
+                session_id,
+                title,
+                topic,
+                _pack_text(content),
+                _pack_text(marp_content),
+                theme,
+                created_at_text,
+                created_at_text
+            )
+            for presentation_id, analysis_id, session_id, title, topic, content, marp_content, theme in rows
+        ])
 
 
 # 전역 발표자료 서비스 인스턴스
@@ -1,12 +1,27 @@
-from typing import List, Dict, Tuple
-from config import settings
+import asyncio
+from typing import List, Dict, Optional, Tuple
+from config import DEFAULT_TOP_K, RAG_BATCH_SIZE, RAG_BATCH_WAIT_MS
+from services.batching import drain_batch
 from services.embedding_service import embedding_service
 from services.vector_service import vector_service
 
 
 class RAGService:
+    """검색 요청을 짧은 시간 동안 모아 쿼리 임베딩과 벡터 검색을 배치로 실행"""
+
     def __init__(self):
-        pass
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batcher())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
 
     async def search_relevant_documents(
         self,
@@ -15,21 +30,50 @@ class RAGService:
         top_k: int = None
     ) -> Tuple[List[str], List[float], List[Dict]]:
         if top_k is None:
-            top_k = settings.DEFAULT_TOP_K
-
-        query_embedding = await embedding_service.generate_single_embedding(query)
-
-        where_filter = None
-        if session_id:
-            where_filter = {"session_id": session_id}
-
-        documents, similarities, metadatas = await vector_service.search_similar(
-            query_embedding=query_embedding,
-            top_k=top_k,
-            where=where_filter
-        )
-
-        return documents, similarities, metadatas
+            top_k = DEFAULT_TOP_K
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, session_id, top_k, future))
+        return await future
+
+    async def _run_batcher(self):
+        while True:
+            batch = await drain_batch(self._queue, RAG_BATCH_SIZE, RAG_BATCH_WAIT_MS)
+            try:
+                await self._search_batch(batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _search_batch(self, batch: List[tuple]):
+        """배치의 쿼리를 한 번에 임베딩하고, 세션별로 묶어 벡터 검색"""
+        result = await embedding_service.generate_embeddings([query for query, *_ in batch])
+        embeddings = result["embeddings"]
+
+        # where 필터는 요청마다 다르므로 session_id별로 묶어 조회 (top_k는 그룹 내 최댓값으로 조회 후 잘라냄)
+        groups: Dict[Optional[str], List[int]] = {}
+        for i, (_, session_id, _, _) in enumerate(batch):
+            groups.setdefault(session_id or None, []).append(i)
+
+        for session_id, indexes in groups.items():
+            where_filter = {"session_id": session_id} if session_id else None
+            try:
+                results = await vector_service.search_similar_batch(
+                    query_embeddings=[embeddings[i] for i in indexes],
+                    top_k=max(batch[i][2] for i in indexes),
+                    where=where_filter
+                )
+            except Exception as e:
+                for i in indexes:
+                    if not batch[i][3].done():
+                        batch[i][3].set_exception(e)
+                continue
+
+            for i, (documents, similarities, metadatas) in zip(indexes, results):
+                top_k, future = batch[i][2], batch[i][3]
+                if not future.done():
+                    future.set_result((documents[:top_k], similarities[:top_k], metadatas[:top_k]))
 
     async def prepare_context(
         self,
@@ -62,19 +106,5 @@ class RAGService:
 
         return context_docs, context_metadata
 
-    async def get_rag_response_data(
-        self,
-        query: str,
-        session_id: str = None,
-        top_k: int = None
-    ) -> Tuple[List[str], List[Dict]]:
-        context_docs, context_metadata = await self.prepare_context(
-            query=query,
-            session_id=session_id,
-            top_k=top_k
-        )
-
-        return context_docs, context_metadata
-
 
 rag_service = RAGService()
@@ -0,0 +1,120 @@
+import hashlib
+import time
+import orjson
+from typing import List, Dict, Optional, AsyncGenerator, Tuple
+
+from models.database import db_manager
+from config import LLM_SERVER_URL, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_REPLAY_CHARS
+from services.llm_client import llm_client
+
+# 만료 항목 정리 최소 간격 (저장할 때마다 정리하지 않음)
+_PURGE_INTERVAL_SECONDS = 600.0
+
+
+class ResponseCache:
+    """동일한 생성 요청의 LLM 스트리밍 응답을 SQLite에 저장해 다시 생성하지 않고 재생 (RESPONSE_CACHE_TTL_SECONDS > 0일 때만)"""
+
+    def __init__(self):
+        self._next_purge = 0.0
+
+    def _key(
+        self,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int,
+        temperature: float,
+        do_sample: bool,
+        context: Optional[List[str]],
+        use_rag_prompt: bool
+    ) -> str:
+        """요청 내용 전체(서버, 프롬프트, RAG 컨텍스트, 생성 옵션)의 sha256"""
+        payload = orjson.dumps([
+            LLM_SERVER_URL,
+            messages,
+            context,
+            max_new_tokens,
+            round(temperature, 1),
+            do_sample,
+            use_rag_prompt
+        ])
+        return hashlib.sha256(payload).hexdigest()
+
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int = 256,
+        temperature: float = 0.7,
+        do_sample: bool = True,
+        context: Optional[List[str]] = None,
+        use_rag_prompt: bool = False
+    ) -> AsyncGenerator[Dict, None]:
+        """llm_client.chat_stream과 같은 이벤트를 내보내되, 캐시된 요청은 저장된 응답을 나눠서 전송"""
+        if RESPONSE_CACHE_TTL_SECONDS <= 0:
+            async for chunk in llm_client.chat_stream(
+                messages, max_new_tokens, temperature, do_sample, context, use_rag_prompt
+            ):
+                yield chunk
+            return
+
+        key = self._key(messages, max_new_tokens, temperature, do_sample, context, use_rag_prompt)
+
+        cached = await self._get(key)
+        if cached is not None:
+            content, complete = cached
+            for i in range(0, len(content), RESPONSE_CACHE_REPLAY_CHARS):
+                yield {
+                    "type": "chunk",
+                    "content": content[i:i + RESPONSE_CACHE_REPLAY_CHARS]
+                }
+            yield complete
+            return
+
+        chunks: List[str] = []
+        complete = None
+        async for chunk in llm_client.chat_stream(
+            messages, max_new_tokens, temperature, do_sample, context, use_rag_prompt
+        ):
+            if chunk.get("type") == "chunk":
+                chunks.append(chunk.get("content", ""))
+            elif chunk.get("type") == "complete":
+                complete = chunk
+            yield chunk
+
+        # 정상적으로 끝난 응답만 저장
+        if complete is not None:
+            try:
+                await self._put(key, "".join(chunks), complete)
+            except Exception as e:
+                print(f"Failed to cache LLM response: {e}")
+
+    async def _get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        """만료되지 않은 캐시 항목 조회 (응답 내용, complete 이벤트)"""
+        async with db_manager.acquire_reader() as conn:
+            async with conn.execute("""
+                SELECT content, complete FROM response_cache
+                WHERE cache_key = ? AND expires_at > ?
+            """, (key, time.time())) as cursor:
+                row = await cursor.fetchone()
+
+        if not row:
+            return None
+        return row[0], orjson.loads(row[1])
+
+    async def _put(self, key: str, content: str, complete: Dict):
+        """응답 저장 (_PURGE_INTERVAL_SECONDS마다 만료된 항목도 함께 정리)"""
+        now = time.time()
+        purge = time.monotonic() >= self._next_purge
+        async with db_manager.transaction() as conn:
+            if purge:
+                # expires_at 인덱스로 만료된 범위만 삭제
+                await conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            await conn.execute("""
+                INSERT OR REPLACE INTO response_cache (cache_key, content, complete, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (key, content, orjson.dumps(complete).decode(), now + RESPONSE_CACHE_TTL_SECONDS))
+
+        if purge:
+            self._next_purge = time.monotonic() + _PURGE_INTERVAL_SECONDS
+
+
+# 전역 응답 캐시 인스턴스
+response_cache = ResponseCache()
@@ -1,30 +1,37 @@
-import uuid
 import json
+import orjson
+from collections import Counter, deque
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from cachetools import TTLCache
 from models.database import db_manager
 from models.schemas import SessionResponse, MessageResponse
-from config import settings
+from services.vector_service import vector_service
+from services.ids import new_id
+from config import settings, MAX_CONTEXT_MESSAGES, CONTEXT_CACHE_SIZE, CONTEXT_CACHE_TTL_SECONDS
 
 
 class SessionService:
+    def __init__(self):
+        # 세션별 최근 MAX_CONTEXT_MESSAGES개 컨텍스트 (프로세스 로컬, 메시지 저장 시 뒤에 추가)
+        self._context_cache: TTLCache = TTLCache(maxsize=CONTEXT_CACHE_SIZE, ttl=CONTEXT_CACHE_TTL_SECONDS)
+        # DB에서 컨텍스트를 읽는 중인 세션별 로드 수와 세대 번호 (로드 중 저장/삭제가 있으면 세대가 바뀌어 로드 결과를 캐시하지 않음)
+        self._loading: Counter = Counter()
+        self._generations: Dict[str, int] = {}
 
     async def create_session(self, metadata: Optional[Dict[str, Any]] = None) -> SessionResponse:
         """새 세션 생성"""
-        session_id = str(uuid.uuid4())
+        session_id = new_id()
         created_at = datetime.now()
 
         if metadata is None:
             metadata = {}
 
-        db = await db_manager.get_connection()
-
-        await db.execute("""
-            INSERT INTO sessions (session_id, created_at, last_accessed, metadata)
-            VALUES (?, ?, ?, ?)
-        """, (session_id, created_at, created_at, json.dumps(metadata)))
-
-        await db.commit()
+        async with db_manager.transaction() as db:
+            await db.execute("""
+                INSERT INTO sessions (session_id, created_at, last_accessed, metadata)
+                VALUES (?, ?, ?, ?)
+            """, (session_id, created_at, created_at, json.dumps(metadata)))
 
         return SessionResponse(
             session_id=session_id,
@@ -34,54 +41,55 @@ class SessionService:
         )
 
     async def get_session(self, session_id: str) -> Optional[SessionResponse]:
-        """세션 조회"""
-        db = await db_manager.get_connection()
-
-        cursor = await db.execute("""
-            SELECT session_id, created_at, last_accessed, metadata
-            FROM sessions
-            WHERE session_id = ?
-        """, (session_id,))
+        """세션 조회 (마지막 접근 시간 갱신과 조회를 한 문장으로 처리)"""
+        now = datetime.now()
+        async with db_manager.transaction() as db:
+            cursor = await db.execute("""
+                UPDATE sessions
+                SET last_accessed = ?
+                WHERE session_id = ?
+                RETURNING session_id, created_at, metadata
+            """, (now, session_id))
+            row = await cursor.fetchone()
 
-        row = await cursor.fetchone()
         if not row:
             return None
 
-        await self._update_last_accessed(session_id)
-
         return SessionResponse(
             session_id=row[0],
             created_at=datetime.fromisoformat(row[1]),
-            last_accessed=datetime.now(),
-            metadata=json.loads(row[3]) if row[3] else {}
+            last_accessed=now,
+            metadata=json.loads(row[2]) if row[2] else {}
         )
 
     async def delete_session(self, session_id: str) -> bool:
         """세션 삭제 (메시지 포함)"""
-        db = await db_manager.get_connection()
-
-        cursor = await db.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,))
-        if not await cursor.fetchone():
-            return False
-
-        await db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
-        await db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
-
-        await db.commit()
-        return True
+        # messages, documents 등 세션에 속한 행은 외래키 ON DELETE CASCADE로 함께 삭제됨
+        async with db_manager.transaction() as db:
+            cursor = await db.execute("""
+                SELECT c.embedding_id
+                FROM document_chunks c
+                JOIN documents d ON d.document_id = c.document_id
+                WHERE d.session_id = ? AND c.embedding_id IS NOT NULL
+            """, (session_id,))
+            embedding_ids = [row[0] for row in await cursor.fetchall()]
+
+            cursor = await db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+        self._context_cache.pop(session_id, None)
+        self._invalidate_loads(session_id)
+        await self._delete_vectors(embedding_ids)
+        return cursor.rowcount > 0
 
     async def get_session_messages(self, session_id: str, limit: Optional[int] = None) -> Optional[List[MessageResponse]]:
-        """세션의 메시지 히스토리 조회"""
-        if not await self._session_exists(session_id):
-            return None
-
-        db = await db_manager.get_connection()
-
+        """세션의 메시지 히스토리 조회 (세션이 없으면 None)"""
+        # 세션 존재 확인과 메시지 조회를 한 번에 처리: 세션이 없으면 행이 없고, 메시지가 없으면 message_id가 NULL인 행 하나
         query = """
-            SELECT message_id, session_id, role, content, created_at, token_usage
-            FROM messages
-            WHERE session_id = ?
-            ORDER BY created_at DESC
+            SELECT m.message_id, m.session_id, m.role, m.content, m.created_at, m.token_usage
+            FROM sessions s
+            LEFT JOIN messages m ON m.session_id = s.session_id
+            WHERE s.session_id = ?
+            ORDER BY m.created_at DESC
         """
 
         params = [session_id]
@@ -89,30 +97,83 @@ class SessionService:
             query += " LIMIT ?"
             params.append(limit)
 
-        cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
+        async with db_manager.acquire_reader() as db:
+            cursor = await db.execute(query, params)
+            rows = await cursor.fetchall()
+
+        if not rows:
+            return None
+        if rows[0][0] is None:
+            return []
 
+        # DB에 저장된 값이므로 검증 없이 생성
         messages = []
         for row in rows:
-            messages.append(MessageResponse(
+            messages.append(MessageResponse.model_construct(
                 message_id=row[0],
                 session_id=row[1],
                 role=row[2],
                 content=row[3],
-                created_at=datetime.fromisoformat(row[4]),
-                token_usage=json.loads(row[5]) if row[5] else None
+                created_at=datetime.fromtimestamp(row[4] / 1e9),
+                token_usage=orjson.loads(row[5]) if row[5] else None
             ))
 
         return messages[::-1]
 
-    async def get_recent_messages_for_context(self, session_id: str, limit: int = None) -> List[Dict[str, str]]:
-        """LLM 컨텍스트용 최근 메시지 조회"""
+    async def get_recent_messages_for_context(self, session_id: str, limit: int = None) -> Tuple[List[Dict[str, str]], bool]:
+        """LLM 컨텍스트용 최근 메시지 조회 (메시지 목록, 시스템 메시지로 시작하는지 여부). 세션이 없으면 ValueError"""
         if limit is None:
-            limit = settings.MAX_CONTEXT_MESSAGES
+            limit = MAX_CONTEXT_MESSAGES
+
+        if limit > MAX_CONTEXT_MESSAGES:
+            # 캐시 범위를 넘는 요청은 DB에서 직접 조회
+            context_messages = await self._load_context(session_id, limit)
+        else:
+            window = self._context_cache.get(session_id)
+            if window is None:
+                window = await self._load_window(session_id)
+            context_messages = list(window)[-limit:]
+
+        if not context_messages:
+            return [], False
+
+        return context_messages, context_messages[0]["role"] == "system"
+
+    async def _load_window(self, session_id: str) -> deque:
+        """DB에서 컨텍스트 창을 읽어 캐시 (읽는 동안 같은 세션에 저장이 커밋됐으면 캐시하지 않음)"""
+        self._loading[session_id] += 1
+        generation = self._generations.get(session_id, 0)
+        try:
+            loaded = await self._load_context(session_id, MAX_CONTEXT_MESSAGES)
+            window = deque(loaded, maxlen=MAX_CONTEXT_MESSAGES)
+            # 로드 중 저장된 행은 스냅샷에 포함됐는지 알 수 없으므로 (누락/중복 방지) 다음 조회 때 다시 로드
+            if self._generations.get(session_id, 0) == generation:
+                self._context_cache[session_id] = window
+            return window
+        finally:
+            self._loading[session_id] -= 1
+            if self._loading[session_id] <= 0:
+                del self._loading[session_id]
+                self._generations.pop(session_id, None)
+
+    def _invalidate_loads(self, session_id: str):
+        """진행 중인 컨텍스트 로드 결과가 캐시되지 않도록 세대 번호 증가"""
+        if session_id in self._loading:
+            self._generations[session_id] = self._generations.get(session_id, 0) + 1
+
+    def cache_saved_messages(self, rows: List[tuple]):
+        """저장된 메시지 행을 캐시된 컨텍스트 뒤에 추가 (캐시에 없는 세션은 다음 조회 때 로드)"""
+        for row in rows:
+            self._invalidate_loads(row[1])
+            window = self._context_cache.get(row[1])
+            if window is not None:
+                window.append({"role": row[2], "content": row[3]})
 
+    async def _load_context(self, session_id: str, limit: int) -> List[Dict[str, str]]:
+        """DB에서 최근 메시지를 컨텍스트 형식으로 조회"""
         messages = await self.get_session_messages(session_id, limit)
-        if not messages:
-            return []
+        if messages is None:
+            raise ValueError(f"Session {session_id} not found")
 
         context_messages = []
         for msg in messages:
@@ -127,39 +188,38 @@ class SessionService:
         """만료된 세션 정리"""
         cutoff_time = datetime.now() - timedelta(hours=settings.SESSION_TIMEOUT_HOURS)
 
-        db = await db_manager.get_connection()
-
-        await db.execute("""
-            DELETE FROM messages 
-            WHERE session_id IN (
-                SELECT session_id FROM sessions 
+        # messages, documents 등 세션에 속한 행은 외래키 ON DELETE CASCADE로 함께 삭제됨
+        async with db_manager.transaction() as db:
+            cursor = await db.execute("""
+                SELECT c.embedding_id
+                FROM document_chunks c
+                JOIN documents d ON d.document_id = c.document_id
+                WHERE d.session_id IN (
+                    SELECT session_id FROM sessions WHERE last_accessed < ?
+                ) AND c.embedding_id IS NOT NULL
+            """, (cutoff_time,))
+            embedding_ids = [row[0] for row in await cursor.fetchall()]
+
+            cursor = await db.execute("""
+                DELETE FROM sessions 
                 WHERE last_accessed < ?
-            )
-        """, (cutoff_time,))
-
-        cursor = await db.execute("""
-            DELETE FROM sessions 
-            WHERE last_accessed < ?
-        """, (cutoff_time,))
+            """, (cutoff_time,))
 
-        await db.commit()
+        # 어떤 세션이 삭제됐는지 모르므로 캐시 전체 비움
+        self._context_cache.clear()
+        for session_id in list(self._loading):
+            self._invalidate_loads(session_id)
+        await self._delete_vectors(embedding_ids)
         return cursor.rowcount
 
-    async def _session_exists(self, session_id: str) -> bool:
-        """세션 존재 여부 확인"""
-        db = await db_manager.get_connection()
-        cursor = await db.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,))
-        return await cursor.fetchone() is not None
-
-    async def _update_last_accessed(self, session_id: str):
-        """세션의 마지막 접근 시간 업데이트"""
-        db = await db_manager.get_connection()
-        await db.execute("""
-            UPDATE sessions 
-            SET last_accessed = ? 
-            WHERE session_id = ?
-        """, (datetime.now(), session_id))
-        await db.commit()
+    async def _delete_vectors(self, embedding_ids: List[str]):
+        """삭제된 세션 문서의 벡터 제거 (쓰기 잠금을 잡지 않도록 커밋 후 호출)"""
+        if not embedding_ids:
+            return
+        try:
+            await vector_service.delete_documents(embedding_ids)
+        except Exception as e:
+            print(f"Failed to delete vectors of deleted sessions: {e}")
 
 
 session_service = SessionService()
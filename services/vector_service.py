@@ -1,8 +1,8 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-import uuid
 from typing import List, Dict, Optional, Tuple
-from config import settings
+from config import settings, DEFAULT_TOP_K, MIN_SIMILARITY_SCORE, CHROMA_MEMORY_LIMIT_BYTES
+from services.ids import new_id
 
 
 class VectorService:
@@ -11,12 +11,16 @@ class VectorService:
         self.collection = None
 
     async def initialize(self):
+        """벡터 DB 열기 (앱 시작 시 한 번 호출, 이후 메서드는 초기화된 collection을 그대로 사용)"""
+        options = {"anonymized_telemetry": False, "allow_reset": True}
+        if CHROMA_MEMORY_LIMIT_BYTES > 0:
+            # 메모리 한도 안에서 최근 사용한 세그먼트(HNSW 인덱스)를 메모리에 유지
+            options["chroma_segment_cache_policy"] = "LRU"
+            options["chroma_memory_limit_bytes"] = CHROMA_MEMORY_LIMIT_BYTES
+
         self.client = chromadb.PersistentClient(
             path=settings.CHROMA_PERSIST_DIR,
-            settings=ChromaSettings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
+            settings=ChromaSettings(**options)
         )
 
         self.collection = self.client.get_or_create_collection(
@@ -24,6 +28,9 @@ class VectorService:
             metadata={"hnsw:space": "cosine"}
         )
 
+        # 첫 요청이 세그먼트 로딩 비용을 치르지 않도록 시작 시 한 번 접근
+        print(f"Vector store ready: {self.collection.count()} embeddings")
+
     async def add_documents(
         self,
         documents: List[str],
@@ -31,11 +38,8 @@ class VectorService:
         metadatas: List[Dict],
         ids: Optional[List[str]] = None
     ) -> List[str]:
-        if not self.collection:
-            await self.initialize()
-
         if ids is None:
-            ids = [str(uuid.uuid4()) for _ in documents]
+            ids = [new_id() for _ in documents]
 
         self.collection.add(
             documents=documents,
@@ -52,47 +56,55 @@ class VectorService:
         top_k: int = None,
         where: Optional[Dict] = None
     ) -> Tuple[List[str], List[float], List[Dict]]:
-        if not self.collection:
-            await self.initialize()
+        results = await self.search_similar_batch([query_embedding], top_k=top_k, where=where)
+        return results[0]
 
+    async def search_similar_batch(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = None,
+        where: Optional[Dict] = None
+    ) -> List[Tuple[List[str], List[float], List[Dict]]]:
+        """여러 쿼리 임베딩을 한 번의 query로 검색 (쿼리별 결과 목록 반환)"""
         if top_k is None:
-            top_k = settings.DEFAULT_TOP_K
+            top_k = DEFAULT_TOP_K
 
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k,
             where=where
         )
 
-        documents = results['documents'][0] if results['documents'] else []
-        distances = results['distances'][0] if results['distances'] else []
-        metadatas = results['metadatas'][0] if results['metadatas'] else []
+        batch_results = []
+        for i in range(len(query_embeddings)):
+            documents = results['documents'][i] if results['documents'] else []
+            distances = results['distances'][i] if results['distances'] else []
+            metadatas = results['metadatas'][i] if results['metadatas'] else []
+            batch_results.append(self._filter_by_similarity(documents, distances, metadatas))
 
-        # 거리를 유사도로 변환 (cosine distance -> similarity)
-        similarities = [1 - distance for distance in distances]
+        return batch_results
 
-        # 최소 유사도 임계값 필터링
-        filtered_results = []
-        for doc, sim, meta in zip(documents, similarities, metadatas):
-            if sim >= settings.MIN_SIMILARITY_SCORE:
-                filtered_results.append((doc, sim, meta))
-
-        if not filtered_results:
-            return [], [], []
+    def _filter_by_similarity(
+        self,
+        documents: List[str],
+        distances: List[float],
+        metadatas: List[Dict]
+    ) -> Tuple[List[str], List[float], List[Dict]]:
+        # Chroma 결과는 거리 오름차순이므로 유사도가 임계값 아래로 처음 떨어지는 곳에서 멈추고 앞부분만 잘라냄
+        similarities = []
+        for distance in distances:
+            similarity = 1 - distance  # cosine distance -> similarity
+            if similarity < MIN_SIMILARITY_SCORE:
+                break
+            similarities.append(similarity)
 
-        docs, sims, metas = zip(*filtered_results)
-        return list(docs), list(sims), list(metas)
+        kept = len(similarities)
+        return documents[:kept], similarities, metadatas[:kept]
 
     async def delete_documents(self, ids: List[str]):
-        if not self.collection:
-            await self.initialize()
-
         self.collection.delete(ids=ids)
 
     async def get_collection_count(self) -> int:
-        if not self.collection:
-            await self.initialize()
-
         return self.collection.count()
 
 